@@ -4,7 +4,7 @@ python "manage.py" migrate --noinput
 
 python "manage.py" collectstatic --noinput
 
-#python "manage.py" start_webhook
+python "manage.py" start_webhook
 
 python "manage.py" setuptasks
 
@@ -1,8 +1,9 @@
 from django.contrib import admin, messages
 from django.contrib.auth.models import Group
-from django.http import HttpResponseRedirect
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponseRedirect, JsonResponse
 from django.shortcuts import redirect
-from django.urls import reverse
+from django.urls import path, reverse
 from django_celery_beat.models import (
     ClockedSchedule,
     CrontabSchedule,
@@ -13,7 +14,6 @@ from django_celery_beat.models import (
 from nested_admin.nested import NestedModelAdmin, NestedStackedInline
 
 from server.apps.mailing import help_texts
-from server.apps.mailing.enums import SendingStatus
 from server.apps.mailing.models import (
     Mailing,
     MailingMedia,
@@ -22,6 +22,7 @@ from server.apps.mailing.models import (
     ScenarioStepMedia,
 )
 from server.apps.mailing.services.service import ScenarioCheckFieldsService
+from server.apps.periodic_tasks.services.progress import BroadcastProgress
 
 
 models_to_unregister = [
@@ -89,14 +90,42 @@ class ScenarioStepInline(NestedStackedInline):
 @admin.register(Mailing)
 class MailingAdmin(admin.ModelAdmin):
     inlines = [MailingMediaInline]
-    list_display = ["title", "is_processed", "successful_sent_count"]
-    readonly_fields = ("is_processed", "successful_sent_count")
+    list_display = ["title", "is_processed", "recipients_count", "sent_count", "failed_count", "blocked_count",
+                    "pending_count"]
+    readonly_fields = ("is_processed", "recipients_count", "sent_count", "failed_count", "blocked_count",
+                       "retried_count", "pending_count")
     fields_help_texts = help_texts.MAILING_FIELDS_HELP_TEXT
-
-    def successful_sent_count(self, obj):
-        return obj.logs.filter(sending_status=SendingStatus.SUCCESS).count()
-
-    successful_sent_count.short_description = "Успешно отправленных"
+    actions = ["resume_broadcast"]
+
+    def pending_count(self, obj):
+        return obj.pending_count
+
+    pending_count.short_description = "Ожидают отправки"
+
+    def get_urls(self):
+        urls = [
+            path(
+                "<int:object_id>/progress/",
+                self.admin_site.admin_view(self.progress_view),
+                name="mailing_mailing_progress",
+            ),
+        ]
+        return urls + super().get_urls()
+
+    def progress_view(self, request, object_id):
+        """Ход отправки рассылки из Redis для опроса со страницы рассылки."""
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        return JsonResponse(BroadcastProgress(object_id).snapshot())
+
+    @admin.action(description="Возобновить прерванную отправку")
+    def resume_broadcast(self, request, queryset):
+        """Продолжение отправки рассылок с контрольной точки без повторной отправки пользователям."""
+        from server.apps.periodic_tasks.tasks import plan_mailing_broadcast
+        mailings = queryset.filter(is_processed=True)
+        for mailing in mailings:
+            plan_mailing_broadcast.delay(mailing.id)
+        self.message_user(request, f"Возобновлена отправка рассылок: {len(mailings)}", messages.SUCCESS)
 
     fieldsets = (
         (
@@ -127,7 +156,8 @@ class MailingAdmin(admin.ModelAdmin):
         (
             "Состояние рассылки",
             {
-                "fields": ("ready_to_send", "is_processed", "successful_sent_count"),
+                "fields": ("ready_to_send", "is_processed", "recipients_count", "sent_count", "failed_count",
+                           "blocked_count", "retried_count", "pending_count"),
             },
         ),
     )
@@ -142,18 +172,15 @@ class MailingAdmin(admin.ModelAdmin):
 @admin.register(Scenario)
 class ScenarioAdmin(NestedModelAdmin):
     inlines = [ScenarioStepInline]
-    list_display = ["title", "steps", "trigger_delay_hours", "is_active", "received"]
+    list_display = ["title", "steps_count", "trigger_delay_hours", "is_active", "received_count"]
     help_text = help_texts.SCENARIO_HELP_TEXT
     fields_help_texts = help_texts.SCENARIO_HELP_TEXTS
 
-    def steps(self, obj):
-        return obj.steps.count()
-
-    def received(self, obj):
-        return obj.steps.last().users.count()
-
-    steps.short_description = "Шагов"
-    received.short_description = "Пользователей полностью получили рассылку"
+    def save_related(self, request, form, formsets, change):
+        """Пересчёт числа шагов после сохранения шагов сценария."""
+        super().save_related(request, form, formsets, change)
+        obj = form.instance
+        Scenario.objects.filter(pk=obj.pk).update(steps_count=obj.steps.count())
 
     fieldsets = (
         (
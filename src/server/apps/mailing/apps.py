@@ -5,3 +5,6 @@ class MailingConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'server.apps.mailing'
     verbose_name = "Рассылки"
+
+    def ready(self):
+        from server.apps.mailing import signals  # noqa: F401
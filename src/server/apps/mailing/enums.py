@@ -5,3 +5,4 @@ class SendingStatus(models.TextChoices):
     """Перечисление статусов отправки рассылки"""
     SUCCESS = 'success', 'Отправлено успешно'
     ERROR = 'error', 'Ошибка при отправке'
+    RETRY = 'retry', 'Отложено для повторной отправки'
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-18 07:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mailing', '0003_alter_mailingmedia_options_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mailingmedia',
+            name='file_id',
+            field=models.CharField(blank=True, editable=False, max_length=255, null=True, verbose_name='Telegram file_id'),
+        ),
+        migrations.AddField(
+            model_name='scenariostepmedia',
+            name='file_id',
+            field=models.CharField(blank=True, editable=False, max_length=255, null=True, verbose_name='Telegram file_id'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.8 on 2026-10-18 09:10
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mailing', '0004_mailingmedia_file_id_scenariostepmedia_file_id'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mailing',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now, verbose_name='Дата и время изменения'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='scenariostep',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now, verbose_name='Дата и время изменения'),
+            preserve_default=False,
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.8 on 2026-10-18 08:07
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def delete_duplicate_user_scenario_mailings(apps, schema_editor):
+    """Удаление повторных записей об отправке шага пользователю перед добавлением уникальности."""
+    UserScenarioMailing = apps.get_model('mailing', 'UserScenarioMailing')
+    duplicates = (
+        UserScenarioMailing.objects.values('user_id', 'scenario_id')
+        .annotate(first_id=Min('id'), count=Count('id'))
+        .filter(count__gt=1)
+    )
+    for duplicate in duplicates.iterator():
+        UserScenarioMailing.objects.filter(
+            user_id=duplicate['user_id'],
+            scenario_id=duplicate['scenario_id'],
+        ).exclude(id=duplicate['first_id']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mailing', '0005_mailing_updated_at_scenariostep_updated_at'),
+        ('users', '0002_botuser_bot_user_active_id_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='mailinglog',
+            index=models.Index(fields=['mail', 'sending_status'], name='mailing_log_mail_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='scenariomailinglog',
+            index=models.Index(fields=['scenario', 'sending_status'], name='scenario_log_status_idx'),
+        ),
+        migrations.RunPython(delete_duplicate_user_scenario_mailings, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='userscenariomailing',
+            constraint=models.UniqueConstraint(fields=('user', 'scenario'), name='unique_user_scenario_step'),
+        ),
+    ]
@@ -0,0 +1,69 @@
+# Generated by Django 5.2.8 on 2026-10-18 08:07
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def fill_counters(apps, schema_editor):
+    """Заполнение счётчиков существующих рассылок и сценариев по логам и отправленным шагам."""
+    Mailing = apps.get_model('mailing', 'Mailing')
+    Scenario = apps.get_model('mailing', 'Scenario')
+    UserScenarioMailing = apps.get_model('mailing', 'UserScenarioMailing')
+
+    mailings = Mailing.objects.annotate(
+        sent=Count('logs', filter=Q(logs__sending_status='success')),
+        failed=Count('logs', filter=Q(logs__sending_status='error')),
+    )
+    for mailing in mailings.iterator():
+        # Недоступных пользователей в старых логах не отличить от прочих ошибок
+        Mailing.objects.filter(pk=mailing.pk).update(
+            recipients_count=mailing.sent + mailing.failed,
+            sent_count=mailing.sent,
+            failed_count=mailing.failed,
+        )
+
+    for scenario in Scenario.objects.annotate(steps_total=Count('steps')).iterator():
+        last_step = scenario.steps.order_by('id').last()
+        received = UserScenarioMailing.objects.filter(scenario=last_step).count() if last_step else 0
+        Scenario.objects.filter(pk=scenario.pk).update(steps_count=scenario.steps_total, received_count=received)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mailing', '0006_mailinglog_mailing_log_mail_status_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mailing',
+            name='blocked_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Недоступных пользователей'),
+        ),
+        migrations.AddField(
+            model_name='mailing',
+            name='failed_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Ошибок отправки'),
+        ),
+        migrations.AddField(
+            model_name='mailing',
+            name='recipients_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Получателей'),
+        ),
+        migrations.AddField(
+            model_name='mailing',
+            name='sent_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Отправлено'),
+        ),
+        migrations.AddField(
+            model_name='scenario',
+            name='received_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Пользователей получили сценарий'),
+        ),
+        migrations.AddField(
+            model_name='scenario',
+            name='steps_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Шагов'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
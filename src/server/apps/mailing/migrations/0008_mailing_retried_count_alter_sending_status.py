@@ -0,0 +1,28 @@
+# Generated by Django 5.2.8 on 2026-10-18 08:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mailing', '0007_mailing_blocked_count_mailing_failed_count_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mailing',
+            name='retried_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Повторных попыток'),
+        ),
+        migrations.AlterField(
+            model_name='mailinglog',
+            name='sending_status',
+            field=models.CharField(choices=[('success', 'Отправлено успешно'), ('error', 'Ошибка при отправке'), ('retry', 'Отложено для повторной отправки')], default=None, null=True, verbose_name='Статус отправки'),
+        ),
+        migrations.AlterField(
+            model_name='scenariomailinglog',
+            name='sending_status',
+            field=models.CharField(choices=[('success', 'Отправлено успешно'), ('error', 'Ошибка при отправке'), ('retry', 'Отложено для повторной отправки')], default=None, null=True, verbose_name='Статус отправки'),
+        ),
+    ]
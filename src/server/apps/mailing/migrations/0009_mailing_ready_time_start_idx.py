@@ -0,0 +1,17 @@
+# Generated by Django 5.2.8 on 2026-10-18 08:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mailing', '0008_mailing_retried_count_alter_sending_status'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='mailing',
+            index=models.Index(condition=models.Q(('is_processed', False), ('ready_to_send', True)), fields=['time_start'], name='mailing_ready_time_start_idx'),
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.core.validators import FileExtensionValidator
 from django.db import models
+from django.utils import timezone
 
 from server.apps.mailing.base.models import BaseLog
 from server.apps.mailing.validators import validate_file_size, validate_url
@@ -19,13 +20,32 @@ class Mailing(models.Model):
     is_processed = models.BooleanField(verbose_name="В обработке", default=False)
     button_text = models.CharField(verbose_name="Текст кнопки", max_length=255, null=True, blank=True)
     button_link = models.CharField(verbose_name="Ссылка кнопки", max_length=255, null=True, blank=True, validators=[validate_url])
+    updated_at = models.DateTimeField(verbose_name="Дата и время изменения", auto_now=True)
+    recipients_count = models.PositiveIntegerField(verbose_name="Получателей", default=0, editable=False)
+    sent_count = models.PositiveIntegerField(verbose_name="Отправлено", default=0, editable=False)
+    failed_count = models.PositiveIntegerField(verbose_name="Ошибок отправки", default=0, editable=False)
+    blocked_count = models.PositiveIntegerField(verbose_name="Недоступных пользователей", default=0, editable=False)
+    retried_count = models.PositiveIntegerField(verbose_name="Повторных попыток", default=0, editable=False)
 
     def __str__(self):
         return self.title
 
+    @property
+    def pending_count(self) -> int:
+        """Число получателей, которым рассылка ещё не отправлялась."""
+        return max(self.recipients_count - self.sent_count - self.failed_count - self.blocked_count, 0)
+
     class Meta:
         verbose_name = "Рассылка"
         verbose_name_plural = "Рассылки"
+        indexes = [
+            # Сверка готовых к отправке и ещё не запущенных рассылок
+            models.Index(
+                fields=["time_start"],
+                condition=models.Q(ready_to_send=True, is_processed=False),
+                name="mailing_ready_time_start_idx",
+            ),
+        ]
 
 
 class MailingMedia(models.Model):
@@ -42,6 +62,23 @@ class MailingMedia(models.Model):
             )
         ]
     )
+    file_id = models.CharField(verbose_name="Telegram file_id", max_length=255, null=True, blank=True, editable=False)
+
+    def save(self, *args, **kwargs):
+        # Загружен новый файл - ранее полученный file_id больше не соответствует содержимому
+        if not self.media._committed:
+            self.file_id = None
+        super().save(*args, **kwargs)
+        self.touch_parent()
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        self.touch_parent()
+        return result
+
+    def touch_parent(self):
+        """Обновление времени изменения рассылки, чтобы план отправки был собран заново."""
+        Mailing.objects.filter(pk=self.mailing_id).update(updated_at=timezone.now())
 
     class Meta:
         verbose_name = "Медиа-файл рассылки"
@@ -56,6 +93,9 @@ class MailingLog(BaseLog):
     class Meta:
         verbose_name = "Лог рассылки"
         verbose_name_plural = "Логи рассылки"
+        indexes = [
+            models.Index(fields=["mail", "sending_status"], name="mailing_log_mail_status_idx"),
+        ]
 
 
 class Scenario(models.Model):
@@ -64,6 +104,8 @@ class Scenario(models.Model):
     title = models.CharField("Название сценария", max_length=255)
     trigger_delay_hours = models.PositiveIntegerField("Запуск через (часов)")
     is_active = models.BooleanField("Активен", default=False)
+    steps_count = models.PositiveIntegerField("Шагов", default=0, editable=False)
+    received_count = models.PositiveIntegerField("Пользователей получили сценарий", default=0, editable=False)
 
     def __str__(self):
         return self.title
@@ -81,6 +123,7 @@ class ScenarioStep(models.Model):
     button_text = models.CharField("Текст кнопки", max_length=255, null=True, blank=True)
     button_url = models.URLField(verbose_name="Ссылка кнопки", null=True, blank=True, validators=[validate_url])
     delay_seconds = models.PositiveIntegerField("Задержка (секунд)", null=True, blank=True)
+    updated_at = models.DateTimeField("Дата и время изменения", auto_now=True)
 
     def __str__(self):
         return self.scenario.title
@@ -104,6 +147,23 @@ class ScenarioStepMedia(models.Model):
             )
         ]
     )
+    file_id = models.CharField(verbose_name="Telegram file_id", max_length=255, null=True, blank=True, editable=False)
+
+    def save(self, *args, **kwargs):
+        # Загружен новый файл - ранее полученный file_id больше не соответствует содержимому
+        if not self.media._committed:
+            self.file_id = None
+        super().save(*args, **kwargs)
+        self.touch_parent()
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        self.touch_parent()
+        return result
+
+    def touch_parent(self):
+        """Обновление времени изменения шага сценария, чтобы план отправки был собран заново."""
+        ScenarioStep.objects.filter(pk=self.scenario_id).update(updated_at=timezone.now())
 
     class Meta:
         verbose_name = "Медиа-файл шага сценария"
@@ -118,6 +178,9 @@ class ScenarioMailingLog(BaseLog):
     class Meta:
         verbose_name = "Лог рассылки"
         verbose_name_plural = "Логи рассылок"
+        indexes = [
+            models.Index(fields=["scenario", "sending_status"], name="scenario_log_status_idx"),
+        ]
 
 
 class UserScenarioMailing(models.Model):
@@ -129,3 +192,6 @@ class UserScenarioMailing(models.Model):
     class Meta:
         verbose_name = "Пользователь рассылки"
         verbose_name_plural = "Пользователи рассылки"
+        constraints = [
+            models.UniqueConstraint(fields=["user", "scenario"], name="unique_user_scenario_step"),
+        ]
@@ -0,0 +1,59 @@
+from typing import Callable, List, Optional, Type
+
+from django.conf import settings
+from django.db import transaction
+
+from server.apps.mailing.base.models import BaseLog
+
+
+class BufferedLogWriter:
+    """Класс-сервис буферизованной записи логов рассылки.
+
+    Логи накапливаются в памяти и записываются пачками через bulk_create.
+    При использовании как контекстного менеджера оставшиеся логи записываются
+    при выходе из блока, в том числе при ошибке. on_flush вызывается с каждой
+    записанной пачкой в той же транзакции, например для обновления счётчиков.
+    """
+
+    def __init__(
+            self,
+            model: Type[BaseLog],
+            batch_size: int = settings.MAILING_LOG_BATCH_SIZE,
+            on_flush: Optional[Callable[[List[BaseLog]], None]] = None,
+            **defaults
+    ):
+        """Инициализация параметров. defaults - значения полей, общие для всех логов."""
+        self.model = model
+        self.batch_size = batch_size
+        self.on_flush = on_flush
+        self.defaults = defaults
+        self.buffer: List[BaseLog] = []
+
+    def add(self, user_id, sending_status: str, error=None) -> None:
+        """Добавление лога в буфер с записью пачки при заполнении буфера."""
+        self.buffer.append(
+            self.model(
+                user_id=user_id,
+                sending_status=sending_status,
+                error=str(error) if error is not None else None,
+                **self.defaults,
+            )
+        )
+        if len(self.buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Запись накопленных логов одним запросом."""
+        if not self.buffer:
+            return
+        buffer, self.buffer = self.buffer, []
+        with transaction.atomic():
+            self.model.objects.bulk_create(buffer, batch_size=self.batch_size)
+            if self.on_flush:
+                self.on_flush(buffer)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.flush()
@@ -0,0 +1,14 @@
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from server.apps.mailing.models import Mailing
+
+
+@receiver(post_save, sender=Mailing)
+def schedule_ready_mailing(sender, instance: Mailing, **kwargs):
+    """Постановка готовой рассылки в очередь после фиксации транзакции вместе с медиа-файлами."""
+    if not instance.ready_to_send or instance.is_processed:
+        return
+    from server.apps.periodic_tasks.tasks import schedule_mailing
+    transaction.on_commit(lambda: schedule_mailing(instance))
@@ -1,21 +1,98 @@
+import asyncio
 import mimetypes
+from typing import Optional
 
+import aiohttp
+from django.conf import settings
+import requests
+from telebot import apihelper, asyncio_helper
+from telebot.types import InlineKeyboardMarkup
 
-def except_telegram_exception(exception, user) -> str:
+from server.bot.utils.keyboards import KeyboardConstructor
+
+
+# Ошибки Telegram API синхронного и асинхронного клиентов
+TELEGRAM_API_EXCEPTIONS = (apihelper.ApiTelegramException, asyncio_helper.ApiTelegramException)
+
+# Ошибки Telegram API (код и фрагмент описания), после которых пользователь деактивируется
+UNREACHABLE_USER_ERRORS = (
+    (403, "bot was blocked by the user"),
+    (400, "chat not found"),
+    (403, "user is deactivated"),
+)
+
+class UnreachableUserError(Exception):
+    """Пользователь уже найден недоступным в другой части той же рассылки, сообщение не отправлялось."""
+
+    def __init__(self, telegram_id: int):
+        super().__init__(f"Пользователь {telegram_id} недоступен по данным другой части рассылки")
+
+
+# Ошибки, после которых отправка не повторяется и пользователь считается недоступным
+# без отдельной записи в журнал: Telegram API и пропуск недоступного пользователя
+EXPECTED_SEND_EXCEPTIONS = TELEGRAM_API_EXCEPTIONS + (UnreachableUserError,)
+
+# Сетевые ошибки синхронного и асинхронного клиентов, после которых отправку можно повторить
+TRANSIENT_NETWORK_EXCEPTIONS = (
+    requests.exceptions.ConnectionError,
+    requests.exceptions.Timeout,
+    apihelper.ApiHTTPException,
+    aiohttp.ClientError,
+    asyncio.TimeoutError,
+    asyncio_helper.RequestTimeout,
+    asyncio_helper.ApiHTTPException,
+)
+
+
+def except_telegram_exception(exception, telegram_id: int, blocked_users) -> str:
+    """Разбор ошибки Telegram API. Недоступные пользователи передаются в blocked_users для деактивации."""
     if exception.error_code == 403 and "bot was blocked by the user" in exception.description:
-        user.is_active = False
-        user.save(update_fields=["is_active"])
-        return f"Пользователь {user.telegram_id} заблокировал бота."
+        blocked_users.add(telegram_id)
+        return f"Пользователь {telegram_id} заблокировал бота."
     elif exception.error_code == 400 and "chat not found" in exception.description:
-        user.is_active = False
-        user.save(update_fields=["is_active"])
-        return f"Чат {user.telegram_id} не найден. Деактивируем."
+        blocked_users.add(telegram_id)
+        return f"Чат {telegram_id} не найден. Деактивируем."
     elif exception.error_code == 403 and "user is deactivated" in exception.description:
-        user.is_active = False
-        user.save(update_fields=["is_active"])
-        return f"Пользователь {user.telegram_id} деактивирован."
+        blocked_users.add(telegram_id)
+        return f"Пользователь {telegram_id} деактивирован."
     else:
-        return f"Неожиданная ошибка Telegram API для пользователя {user.telegram_id}: {exception}"
+        return f"Неожиданная ошибка Telegram API для пользователя {telegram_id}: {exception}"
+
+
+def is_unreachable_user_error(exception: Exception) -> bool:
+    """Ошибка означает, что пользователь больше не может получать сообщения бота."""
+    if isinstance(exception, UnreachableUserError):
+        return True
+    if not isinstance(exception, TELEGRAM_API_EXCEPTIONS):
+        return False
+    return any(
+        exception.error_code == error_code and error in exception.description
+        for error_code, error in UNREACHABLE_USER_ERRORS
+    )
+
+
+def is_flood_error(exception: Exception) -> bool:
+    """Telegram ограничил частоту отправки (429 Too Many Requests)."""
+    return isinstance(exception, TELEGRAM_API_EXCEPTIONS) and exception.error_code == 429
+
+
+def get_retry_after(exception: Exception, attempt: int = 0) -> Optional[int]:
+    """Задержка в секундах перед повторной отправкой после временной ошибки.
+
+    Для 429 используется retry_after из ответа Telegram, для 5xx и сетевых ошибок -
+    экспоненциально растущая с номером попытки задержка. Для постоянных ошибок возвращает None.
+    """
+    backoff = settings.BROADCAST_RETRY_DELAY * 2 ** attempt
+    if isinstance(exception, TELEGRAM_API_EXCEPTIONS):
+        if exception.error_code == 429:
+            parameters = (exception.result_json or {}).get("parameters") or {}
+            return int(parameters.get("retry_after") or backoff)
+        if exception.error_code >= 500:
+            return backoff
+        return None
+    if isinstance(exception, TRANSIENT_NETWORK_EXCEPTIONS):
+        return backoff
+    return None
 
 
 def media_is_video(file_path):
@@ -24,3 +101,11 @@ def media_is_video(file_path):
         return True
     else:
         return False
+
+
+def create_button_keyboard(button_text: str, button_url: str) -> InlineKeyboardMarkup:
+    """Формирование клавиатуры с кнопкой-ссылкой, если заполнены оба поля кнопки."""
+    data = {}
+    if button_text and button_url:
+        data = {button_text: button_url}
+    return KeyboardConstructor().create_mixed_keyboard(url_data=data)
@@ -1,7 +1,7 @@
 from django.conf import settings
 from django.core.management import BaseCommand
 from django.utils import timezone
-from django_celery_beat.models import CrontabSchedule, PeriodicTask
+from django_celery_beat.models import CrontabSchedule, IntervalSchedule, PeriodicTask
 
 
 class Command(BaseCommand):
@@ -49,19 +49,25 @@ class Command(BaseCommand):
             timezone=settings.TIME_ZONE
         )
 
-        _ = PeriodicTask.objects.update_or_create(
-            name="Отправка запланированных рассылок, готовых к отправке",
-            defaults={
-                'crontab': every_one_min_cron,
-                'task': 'server.apps.periodic_tasks.tasks.send_timed_mailing',
-            }
+        # Рассылки ставятся в очередь при сохранении, ежеминутный опрос больше не нужен
+        PeriodicTask.objects.filter(
+            task__in=(
+                'server.apps.periodic_tasks.tasks.send_timed_mailing',
+                'server.apps.periodic_tasks.tasks.send_instant_mailing',
+            )
+        ).delete()
+
+        reconcile_interval, _ = IntervalSchedule.objects.get_or_create(
+            every=settings.MAILING_RECONCILE_INTERVAL,
+            period=IntervalSchedule.SECONDS,
         )
 
         _ = PeriodicTask.objects.update_or_create(
-            name='Отправка моментальных рассылок, готовых с отправке',
+            name="Сверка готовых к отправке рассылок",
             defaults={
-                'crontab': every_one_min_cron,
-                'task': 'server.apps.periodic_tasks.tasks.send_instant_mailing',
+                'interval': reconcile_interval,
+                'crontab': None,
+                'task': 'server.apps.periodic_tasks.tasks.reconcile_mailings',
             }
         )
 
@@ -0,0 +1,150 @@
+import asyncio
+from typing import Callable, Iterator, List, Optional, Sequence, Tuple
+
+from django.conf import settings
+from telebot import asyncio_helper
+from telebot.async_telebot import AsyncTeleBot
+
+from server.apps.periodic_tasks.helpers import UnreachableUserError, is_flood_error
+from server.apps.periodic_tasks.services.plan import SendPlan
+from server.apps.periodic_tasks.services.rate_limiter import AsyncRateLimiter
+from server.apps.periodic_tasks.services.sender import BaseMessageSender, SendResult
+
+
+class AsyncMessageSender(BaseMessageSender):
+    """Класс-сервис асинхронной отправки сообщений.
+
+    Держит одновременно до concurrency запросов к Telegram через общий пул keep-alive
+    соединений aiohttp и соблюдает общий с синхронной отправкой лимит частоты.
+    """
+
+    def __init__(self, concurrency: int = settings.BROADCAST_ASYNC_CONCURRENCY, traffic: Optional[str] = None):
+        """Инициализация параметров. traffic - тип трафика для доли общей частоты отправки."""
+        self.concurrency = concurrency
+        self.traffic = traffic
+
+    def send_many(
+            self,
+            telegram_ids: Sequence[int],
+            plan: SendPlan,
+            skip: Callable[[int], bool],
+            heartbeat: Optional[Callable[[], None]] = None,
+            on_delivered: Optional[Callable[[int], None]] = None,
+    ) -> Iterator[SendResult]:
+        file_ids = [media_item.file_id for media_item in plan.media]
+        results, error = asyncio.run(self._send_many(telegram_ids, plan, skip, heartbeat, on_delivered))
+
+        # Запросы к базе выполняются вне цикла событий: сохраняем file_id, полученные при отправке
+        plan.save_file_ids(
+            [media_item for media_item, file_id in zip(plan.media, file_ids) if media_item.file_id != file_id]
+        )
+        yield from results
+        if error:
+            raise error
+
+    async def _send_many(
+            self,
+            telegram_ids: Sequence[int],
+            plan: SendPlan,
+            skip: Callable[[int], bool],
+            heartbeat: Optional[Callable[[], None]],
+            on_delivered: Optional[Callable[[int], None]],
+    ) -> Tuple[List[SendResult], Optional[Exception]]:
+        """Конкурентная отправка сообщения пользователям в одном цикле событий.
+
+        Результаты возвращаются только после отправки всей части, поэтому доставка отмечается
+        on_delivered сразу (в отдельном потоке, вне цикла событий): если воркер упадёт посреди
+        части, доставленным пользователям сообщение не отправится повторно.
+        Возвращает результаты выполненных отправок и ошибку heartbeat или on_delivered,
+        остановившую отправку.
+        """
+        asyncio_helper.REQUEST_LIMIT = self.concurrency
+        bot = AsyncTeleBot(settings.BOT_TOKEN, parse_mode='HTML')
+        limiter = AsyncRateLimiter(traffic=self.traffic)
+        semaphore = asyncio.Semaphore(self.concurrency)
+        skipped = {telegram_id for telegram_id in telegram_ids if skip(telegram_id)}
+        telegram_ids = [telegram_id for telegram_id in telegram_ids if telegram_id not in skipped]
+        stopped: List[Exception] = []
+
+        async def send_one(telegram_id: int) -> Optional[SendResult]:
+            async with semaphore:
+                if stopped:
+                    return None
+                if heartbeat:
+                    try:
+                        heartbeat()
+                    except Exception as err:
+                        # Остальным пользователям не отправляем, отправки в полёте завершаются
+                        stopped.append(err)
+                        return None
+                try:
+                    await self.send(bot, limiter, telegram_id, plan)
+                except Exception as err:
+                    if is_flood_error(err):
+                        await limiter.throttle()
+                    return telegram_id, err
+                if on_delivered:
+                    try:
+                        await asyncio.to_thread(on_delivered, telegram_id)
+                    except Exception as err:
+                        stopped.append(err)
+                return telegram_id, None
+
+        results = [(telegram_id, UnreachableUserError(telegram_id)) for telegram_id in skipped]
+        try:
+            if telegram_ids and not all(media_item.file_id for media_item in plan.media):
+                # Первая отправка загружает медиа в Telegram, остальные используют полученные file_id
+                results.append(await send_one(telegram_ids.pop(0)))
+            results.extend(await asyncio.gather(*(send_one(telegram_id) for telegram_id in telegram_ids)))
+        finally:
+            await limiter.close()
+            if asyncio_helper.session_manager.session:
+                await bot.close_session()
+        return [result for result in results if result], stopped[0] if stopped else None
+
+    async def send(self, bot: AsyncTeleBot, limiter: AsyncRateLimiter, chat_id: int, plan: SendPlan) -> None:
+        """Отправка сообщения. Исключения Telegram API пробрасываются вызывающему коду."""
+        try:
+            await self._send(bot, limiter, chat_id, plan)
+        except Exception as err:
+            if not self._is_invalid_file_id(err, plan):
+                raise
+            self._reset_file_ids(plan)
+            await self._send(bot, limiter, chat_id, plan)
+
+    async def _send(self, bot: AsyncTeleBot, limiter: AsyncRateLimiter, chat_id: int, plan: SendPlan) -> None:
+        """Отправка сообщения с подстановкой сохранённых file_id вместо содержимого файлов."""
+        opened_files = []
+        try:
+            if plan.kind == SendPlan.GROUP:
+                media_group = self._build_media_group(plan, opened_files)
+                await limiter.acquire(chat_id)
+                messages = await bot.send_media_group(chat_id=chat_id, media=media_group)
+                self._remember_file_ids(plan.media, messages)
+                await limiter.acquire(chat_id)
+                await bot.send_message(chat_id=chat_id, text=plan.text, reply_markup=plan.keyboard)
+            elif plan.kind == SendPlan.SINGLE:
+                media_item = plan.media[0]
+                media = self._get_input_file(media_item, opened_files)
+                await limiter.acquire(chat_id)
+                if media_item.is_video:
+                    message = await bot.send_video(
+                        chat_id=chat_id, video=media, caption=plan.text, reply_markup=plan.keyboard
+                    )
+                else:
+                    message = await bot.send_photo(
+                        chat_id=chat_id, photo=media, caption=plan.text, reply_markup=plan.keyboard
+                    )
+                self._remember_file_ids(plan.media, [message])
+            elif plan.kind == SendPlan.VIDEO_NOTE:
+                await limiter.acquire(chat_id)
+                await bot.send_video_note(chat_id, plan.media[0].file_id)
+            elif plan.kind == SendPlan.VOICE:
+                await limiter.acquire(chat_id)
+                await bot.send_voice(chat_id, plan.media[0].file_id)
+            else:
+                await limiter.acquire(chat_id)
+                await bot.send_message(chat_id=chat_id, text=plan.text, reply_markup=plan.keyboard)
+        finally:
+            for file in opened_files:
+                file.close()
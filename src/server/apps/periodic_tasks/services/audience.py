@@ -0,0 +1,44 @@
+from typing import Iterator, List, Optional, Tuple
+
+from django.conf import settings
+from django.db.models import QuerySet
+
+from server.apps.periodic_tasks.services.checkpoint import Chunk
+from server.apps.users.models import BotUser
+
+
+class Audience:
+    """Класс-сервис постраничной выборки аудитории рассылки.
+
+    Выбирает только пары (pk, telegram_id) страницами по первичному ключу
+    (keyset-пагинация), поэтому потребление памяти не зависит от размера аудитории.
+    """
+
+    def __init__(self, queryset: Optional[QuerySet] = None, page_size: int = settings.BROADCAST_CHUNK_SIZE):
+        """Инициализация параметров. По умолчанию аудитория - все активные пользователи бота."""
+        self.queryset = queryset if queryset is not None else BotUser.objects.filter(is_active=True)
+        self.page_size = page_size
+
+    def iter_pages(self, after_pk: int = 0) -> Iterator[List[Tuple[int, int]]]:
+        """Страницы пар (pk, telegram_id) пользователей с первичным ключом больше after_pk."""
+        while True:
+            page = list(
+                self.queryset.filter(pk__gt=after_pk)
+                .order_by("pk")
+                .values_list("pk", "telegram_id")[:self.page_size]
+            )
+            if not page:
+                return
+            yield page
+            after_pk = page[-1][0]
+
+    def iter_chunks(self, after_pk: int = 0) -> Iterator[Chunk]:
+        """Диапазоны первичных ключей (first_pk, last_pk), по page_size пользователей в каждом."""
+        for page in self.iter_pages(after_pk):
+            yield page[0][0], page[-1][0]
+
+    def iter_telegram_ids(self, after_pk: int = 0) -> Iterator[int]:
+        """Telegram ID всех пользователей аудитории."""
+        for page in self.iter_pages(after_pk):
+            for _, telegram_id in page:
+                yield telegram_id
@@ -0,0 +1,470 @@
+from abc import ABC, abstractmethod
+from contextlib import nullcontext
+import time
+from typing import List, Optional, Sequence, Union
+
+from celery.canvas import Signature
+from django.conf import settings
+from django.db import models
+from django.db.models import F
+from loguru import logger
+from telebot.types import InlineKeyboardMarkup
+
+from server.apps.mailing.base.models import BaseLog
+from server.apps.mailing.enums import SendingStatus
+from server.apps.mailing.models import (
+    Mailing,
+    MailingLog,
+    Scenario,
+    ScenarioMailingLog,
+    ScenarioStep,
+)
+from server.apps.mailing.services.logs import BufferedLogWriter
+from server.apps.periodic_tasks.helpers import (
+    EXPECTED_SEND_EXCEPTIONS,
+    TELEGRAM_API_EXCEPTIONS,
+    create_button_keyboard,
+    except_telegram_exception,
+    get_retry_after,
+    is_unreachable_user_error,
+)
+from server.apps.periodic_tasks.services.async_sender import AsyncMessageSender
+from server.apps.periodic_tasks.services.audience import Audience
+from server.apps.periodic_tasks.services.checkpoint import BroadcastCheckpoint, Chunk
+from server.apps.periodic_tasks.services.deactivation import BlockedUsersCollector
+from server.apps.periodic_tasks.services.lease import Lease, LeaseHeldError
+from server.apps.periodic_tasks.services.plan import SendPlan
+from server.apps.periodic_tasks.services.progress import BroadcastProgress
+from server.apps.periodic_tasks.services.sender import BaseMessageSender, MessageSender
+from server.apps.users.models import BotUser
+
+
+SENDER_BACKENDS = {
+    "sync": MessageSender,
+    "async": AsyncMessageSender,
+}
+
+
+class BaseBroadcast(ABC):
+    """Базовый класс-сервис отправки сообщения части пользователей бота.
+
+    Все рассылки проходят одни и те же этапы: выбор получателей части аудитории,
+    получение плана отправки (get_plan), отправка с общим ограничением частоты
+    (sender.send_many), приём результатов (on_success/on_error и журнал логов)
+    и итоговый отчёт, который формирует конкретная рассылка.
+
+    Пользователи, отправка которым не удалась из-за 429, ошибки 5xx или сети, не считаются
+    ошибками (on_retry) и отправляются повторно отложенной задачей (schedule_retry) после
+    retry_after секунд. attempt - номер повторной попытки, после BROADCAST_MAX_RETRIES
+    попыток временная ошибка считается постоянной.
+    """
+
+    # Тип трафика: определяет долю общей частоты отправки (BROADCAST_TRAFFIC_RATES)
+    traffic = "bulk"
+
+    def __init__(self, sender: Optional[BaseMessageSender] = None, attempt: int = 0):
+        """Инициализация параметров."""
+        self.sender = sender or SENDER_BACKENDS[settings.BROADCAST_SENDER_BACKEND](traffic=self.traffic)
+        self.attempt = attempt
+
+    def create_log_writer(self) -> Union[BufferedLogWriter, nullcontext]:
+        """Журнал логов отправки. По умолчанию логи не пишутся."""
+        return nullcontext()
+
+    def send_chunk(self, telegram_ids: List[int]) -> None:
+        """Отправка сообщения активным пользователям из части."""
+        telegram_ids = BotUser.objects.filter(telegram_id__in=telegram_ids, is_active=True).values_list(
+            "telegram_id", flat=True
+        )
+        self.send(list(telegram_ids))
+
+    @abstractmethod
+    def get_plan(self) -> SendPlan:
+        """План отправки сообщения."""
+
+    @property
+    @abstractmethod
+    def blocked_users_key(self) -> Optional[str]:
+        """Ключ множества пользователей, найденных недоступными во время этой рассылки.
+
+        None - рассылка не делит множество с другими задачами.
+        """
+
+    def send(self, telegram_ids: List[int]) -> None:
+        """Отправка сообщения пользователям."""
+        plan = self.get_plan()
+
+        retry_ids, retry_delay = [], 0
+        self.logs = self.create_log_writer()
+        with self.logs, BlockedUsersCollector(self.blocked_users_key) as blocked_users:
+            results = self.sender.send_many(
+                telegram_ids,
+                plan,
+                skip=blocked_users.is_blocked,
+                heartbeat=self.heartbeat,
+                on_delivered=self.on_delivered,
+            )
+            for telegram_id, error in results:
+                if error is None:
+                    self.on_success(telegram_id)
+                    continue
+                retry_after = self.get_retry_after(error)
+                if retry_after is not None:
+                    retry_ids.append(telegram_id)
+                    retry_delay = max(retry_delay, retry_after)
+                    self.on_retry(telegram_id, error, retry_after)
+                    continue
+                if isinstance(error, TELEGRAM_API_EXCEPTIONS):
+                    log_message = except_telegram_exception(error, telegram_id, blocked_users)
+                    logger.error(log_message)
+                self.on_error(telegram_id, error)
+
+        if retry_ids:
+            self.schedule_retry(retry_ids, retry_delay)
+
+    def heartbeat(self) -> None:
+        """Проверка перед каждой отправкой, что рассылку можно продолжать. Исключение прекращает отправку."""
+
+    def on_delivered(self, telegram_id: int) -> None:
+        """Отметка доставки сразу после отправки, до обработки результата."""
+
+    def get_retry_after(self, error: Exception) -> Optional[int]:
+        """Задержка перед повторной отправкой или None, если ошибка постоянная или попытки исчерпаны."""
+        if self.attempt >= settings.BROADCAST_MAX_RETRIES:
+            return None
+        return get_retry_after(error, self.attempt)
+
+    @abstractmethod
+    def schedule_retry(self, telegram_ids: List[int], delay: int) -> None:
+        """Постановка повторной отправки пользователям в очередь с отсрочкой delay секунд."""
+
+    def on_success(self, telegram_id: int) -> None:
+        """Обработка успешной отправки сообщения пользователю."""
+
+    def on_error(self, telegram_id: int, error: Exception) -> None:
+        """Обработка ошибки отправки сообщения пользователю."""
+
+    def on_retry(self, telegram_id: int, error: Exception, retry_after: int) -> None:
+        """Обработка временной ошибки, после которой отправка пользователю будет повторена."""
+        logger.warning(
+            f"Отправка пользователю {telegram_id} отложена на {retry_after} с "
+            f"(попытка {self.attempt + 1}): {error}"
+        )
+
+
+class ModelBroadcast(BaseBroadcast):
+    """Базовый класс-сервис рассылки, содержимое которой хранится в модели (рассылка, шаг сценария)."""
+
+    @property
+    @abstractmethod
+    def instance(self) -> models.Model:
+        """Объект модели с содержимым рассылки."""
+
+    @property
+    @abstractmethod
+    def text(self) -> str:
+        """Текст сообщения."""
+
+    @property
+    @abstractmethod
+    def keyboard(self) -> InlineKeyboardMarkup:
+        """Клавиатура сообщения."""
+
+    @property
+    @abstractmethod
+    def media_files(self) -> Sequence:
+        """Медиа-файлы сообщения."""
+
+    def get_plan(self) -> SendPlan:
+        """План отправки: собирается один раз и переиспользуется всеми частями до изменения объекта."""
+        return SendPlan.get(
+            self.instance,
+            lambda cache_key: SendPlan.build(cache_key, self.text, self.keyboard, self.media_files),
+        )
+
+
+class ChunkedBroadcast(BaseBroadcast):
+    """Базовый класс-сервис рассылки всем активным пользователям бота, разбитой на части.
+
+    Части - диапазоны первичных ключей пользователей. Их состояние хранится в контрольной
+    точке, поэтому повторно доставленная задача части не отправляет сообщение дважды.
+    """
+
+    def __init__(
+            self,
+            broadcast_id: Union[int, str],
+            sender: Optional[BaseMessageSender] = None,
+            attempt: int = 0,
+    ):
+        """Инициализация параметров."""
+        super().__init__(sender, attempt)
+        self.broadcast_id = broadcast_id
+        self.checkpoint = BroadcastCheckpoint(broadcast_id)
+        self.sent = 0
+        self.lease: Optional[Lease] = None
+
+    @property
+    def blocked_users_key(self) -> str:
+        return f"broadcast:{self.broadcast_id}:blocked"
+
+    def send_range(self, chunk: Chunk) -> None:
+        """Отправка рассылки части пользователей с отметкой в контрольной точке.
+
+        Пользователи, которым рассылка уже отправлена до перезапуска, пропускаются.
+        Аренда части продлевается перед каждой отправкой (heartbeat). Если часть не завершена,
+        а аренда занята другим воркером, выбрасывает LeaseHeldError: задача должна повторить
+        отправку позже, так как аренда упавшего воркера истечёт без завершения части.
+        """
+        if self.checkpoint.is_chunk_done(chunk):
+            logger.info(f"Часть {chunk} рассылки {self.broadcast_id} уже отправлена")
+            return
+        self.lease = self.checkpoint.chunk_lease(chunk)
+        if not self.lease.acquire():
+            self.lease = None
+            raise LeaseHeldError(f"Часть {chunk} рассылки {self.broadcast_id} отправляется другим воркером")
+        try:
+            telegram_ids = Audience().queryset.filter(pk__range=chunk).values_list("telegram_id", flat=True)
+            self.send(self.checkpoint.filter_unsent(list(telegram_ids)))
+            self.checkpoint.complete_chunk(chunk, sent=self.sent)
+            self.sent = 0
+        finally:
+            self.on_range_finished()
+            self.lease.release()
+            self.lease = None
+
+    def send_retry(self, telegram_ids: List[int]) -> None:
+        """Повторная отправка рассылки пользователям, отправка которым была отложена."""
+        try:
+            self.send_chunk(self.checkpoint.filter_unsent(telegram_ids))
+            self.checkpoint.complete_retry(len(telegram_ids), sent=self.sent)
+            self.sent = 0
+        finally:
+            self.on_range_finished()
+
+    def schedule_retry(self, telegram_ids: List[int], delay: int) -> None:
+        # Пока повторная попытка не завершена, рассылка не считается отправленной
+        self.checkpoint.add_retry(len(telegram_ids))
+        self.retry_task(telegram_ids).apply_async(countdown=delay)
+
+    @abstractmethod
+    def retry_task(self, telegram_ids: List[int]) -> Signature:
+        """Задача повторной отправки рассылки пользователям."""
+
+    def on_range_finished(self) -> None:
+        """Обработка завершения отправки части, в том числе с ошибкой."""
+
+    def heartbeat(self) -> None:
+        """Продление аренды отправляемой части. Если аренда потеряна, отправка прекращается."""
+        if self.lease:
+            self.lease.renew_if_due()
+
+    def on_delivered(self, telegram_id: int) -> None:
+        self.checkpoint.mark_sent(telegram_id)
+
+    def on_success(self, telegram_id: int) -> None:
+        self.sent += 1
+
+    def on_error(self, telegram_id: int, error: Exception) -> None:
+        self.checkpoint.mark_sent(telegram_id)
+
+
+class MailingBroadcast(ModelBroadcast, ChunkedBroadcast):
+    """Класс-сервис рассылки всем активным пользователям бота."""
+
+    def __init__(self, mailing: Mailing, sender: Optional[BaseMessageSender] = None, attempt: int = 0):
+        """Инициализация параметров."""
+        super().__init__(mailing.id, sender, attempt)
+        self.mailing = mailing
+        self.progress = BroadcastProgress(mailing.id)
+        self.unreachable_users = set()
+
+    def on_range_finished(self) -> None:
+        self.progress.flush()
+
+    @property
+    def instance(self) -> models.Model:
+        return self.mailing
+
+    @property
+    def text(self) -> str:
+        return self.mailing.text
+
+    @property
+    def keyboard(self) -> InlineKeyboardMarkup:
+        return create_button_keyboard(self.mailing.button_text, self.mailing.button_link)
+
+    @property
+    def media_files(self) -> Sequence:
+        return self.mailing.media_files.order_by("id")
+
+    def create_log_writer(self) -> BufferedLogWriter:
+        return BufferedLogWriter(MailingLog, on_flush=self.update_counters, mail=self.mailing)
+
+    def update_counters(self, logs: List[BaseLog]) -> None:
+        """Увеличение счётчиков рассылки на результаты записанной пачки логов."""
+        sent = sum(log.sending_status == SendingStatus.SUCCESS for log in logs)
+        retried = sum(log.sending_status == SendingStatus.RETRY for log in logs)
+        blocked = sum(log.user_id in self.unreachable_users for log in logs)
+        Mailing.objects.filter(pk=self.mailing.pk).update(
+            sent_count=F("sent_count") + sent,
+            failed_count=F("failed_count") + len(logs) - sent - retried - blocked,
+            blocked_count=F("blocked_count") + blocked,
+            retried_count=F("retried_count") + retried,
+        )
+
+    def retry_task(self, telegram_ids: List[int]) -> Signature:
+        from server.apps.periodic_tasks.tasks import retry_mailing_recipients
+
+        return retry_mailing_recipients.si(self.mailing.id, telegram_ids, self.attempt + 1)
+
+    def on_success(self, telegram_id: int) -> None:
+        super().on_success(telegram_id)
+        self.logs.add(telegram_id, SendingStatus.SUCCESS)
+        self.progress.add_sent()
+        logger.info("Отправка рассылки успешно завершена")
+
+    def on_error(self, telegram_id: int, error: Exception) -> None:
+        super().on_error(telegram_id, error)
+        is_unreachable = is_unreachable_user_error(error)
+        if is_unreachable:
+            self.unreachable_users.add(telegram_id)
+        self.progress.add_error(error, blocked=is_unreachable)
+        self.logs.add(telegram_id, SendingStatus.ERROR, error=error)
+        if not isinstance(error, EXPECTED_SEND_EXCEPTIONS):
+            logger.error(f"Ошибка при отправке рассылки: {error}")
+
+    def on_retry(self, telegram_id: int, error: Exception, retry_after: int) -> None:
+        super().on_retry(telegram_id, error, retry_after)
+        self.progress.add_retry(error)
+        self.logs.add(telegram_id, SendingStatus.RETRY, error=error)
+
+
+class FileBroadcast(ChunkedBroadcast):
+    """Класс-сервис рассылки всем активным пользователям кружка или голосового сообщения.
+
+    Файл уже загружен в Telegram администратором, поэтому рассылается по его file_id.
+    """
+
+    def __init__(
+            self,
+            broadcast_id: str,
+            message_type: str,
+            file_id: str,
+            admin_id: int,
+            sender: Optional[BaseMessageSender] = None,
+            attempt: int = 0,
+    ):
+        """Инициализация параметров. admin_id - администратор, которому отправляется итоговый отчёт."""
+        super().__init__(broadcast_id, sender, attempt)
+        self.message_type = message_type
+        self.file_id = file_id
+        self.admin_id = admin_id
+
+    def get_plan(self) -> SendPlan:
+        return SendPlan.for_file(self.message_type, self.file_id)
+
+    def retry_task(self, telegram_ids: List[int]) -> Signature:
+        from server.apps.periodic_tasks.tasks import retry_file_recipients
+
+        return retry_file_recipients.si(
+            self.broadcast_id, self.message_type, self.file_id, self.admin_id, telegram_ids, self.attempt + 1
+        )
+
+    def on_error(self, telegram_id: int, error: Exception) -> None:
+        super().on_error(telegram_id, error)
+        if not isinstance(error, EXPECTED_SEND_EXCEPTIONS):
+            logger.error(f"Возникла ошибка при отправке файла рассылки {self.broadcast_id}: {error}")
+
+
+class ScenarioStepBroadcast(ModelBroadcast):
+    """Класс-сервис отправки шага сценария части пользователей бота.
+
+    После отправки шага следующие шаги next_step_ids ставятся в очередь для пользователей,
+    отправка которым завершена. Отложенные пользователи переходят к ним после повтора шага.
+    """
+
+    traffic = "scenario"
+
+    def __init__(
+            self,
+            step: ScenarioStep,
+            next_step_ids: Sequence[int] = (),
+            sender: Optional[BaseMessageSender] = None,
+            attempt: int = 0,
+    ):
+        """Инициализация параметров."""
+        super().__init__(sender, attempt)
+        self.step = step
+        self.next_step_ids = list(next_step_ids)
+        self.finished_ids: List[int] = []
+
+    @property
+    def instance(self) -> models.Model:
+        return self.step
+
+    @property
+    def text(self) -> str:
+        return self.step.text
+
+    @property
+    def keyboard(self) -> InlineKeyboardMarkup:
+        return create_button_keyboard(self.step.button_text, self.step.button_url)
+
+    @property
+    def media_files(self) -> Sequence:
+        return self.step.media_files.order_by("id")
+
+    @property
+    def blocked_users_key(self) -> Optional[str]:
+        # Шаг отправляется задачами в течение всей жизни сценария, и общее множество пропускало бы
+        # снова активированных пользователей. Недоступные пользователи деактивируются, а send_chunk
+        # отправляет шаг только активным, поэтому множество шагу не нужно
+        return None
+
+    def create_log_writer(self) -> BufferedLogWriter:
+        return BufferedLogWriter(ScenarioMailingLog, on_flush=self.record_sent, scenario_id=self.step.scenario_id)
+
+    def record_sent(self, logs: List[BaseLog]) -> None:
+        """Учёт доставки последнего шага в счётчике пользователей, получивших сценарий.
+
+        Шаг записывается пользователю при захвате до отправки (claim_scenario_step).
+        """
+        telegram_ids = [log.user_id for log in logs if log.sending_status == SendingStatus.SUCCESS]
+        if telegram_ids and not self.next_step_ids:
+            Scenario.objects.filter(pk=self.step.scenario_id).update(
+                received_count=F("received_count") + len(telegram_ids),
+            )
+
+    def send(self, telegram_ids: List[int]) -> None:
+        from server.apps.periodic_tasks.tasks import schedule_scenario_steps
+
+        try:
+            super().send(telegram_ids)
+        finally:
+            # Пользователи, отправка которым завершена до ошибки, продолжают сценарий
+            schedule_scenario_steps(self.next_step_ids, self.finished_ids)
+
+    def schedule_retry(self, telegram_ids: List[int], delay: int) -> None:
+        from server.apps.periodic_tasks.tasks import send_scenario_step
+
+        # Пользователям шаг уже захвачен, повторная задача отправляет его без захвата
+        send_scenario_step.si(
+            [self.step.id, *self.next_step_ids], telegram_ids, self.attempt + 1, time.time() + delay
+        ).apply_async(countdown=delay)
+
+    def on_success(self, telegram_id: int) -> None:
+        self.finished_ids.append(telegram_id)
+        self.logs.add(telegram_id, SendingStatus.SUCCESS)
+        logger.success(f"Шаг сценария {self.step.id} успешно отправлен пользователю {telegram_id}")
+
+    def on_error(self, telegram_id: int, error: Exception) -> None:
+        self.finished_ids.append(telegram_id)
+        self.logs.add(telegram_id, SendingStatus.ERROR, error=error)
+        if not isinstance(error, EXPECTED_SEND_EXCEPTIONS):
+            logger.error(
+                f"Возникла ошибка при отправке пользователю {telegram_id} шага сценария {self.step.id}: {error}"
+            )
+
+    def on_retry(self, telegram_id: int, error: Exception, retry_after: int) -> None:
+        super().on_retry(telegram_id, error, retry_after)
+        self.logs.add(telegram_id, SendingStatus.RETRY, error=error)
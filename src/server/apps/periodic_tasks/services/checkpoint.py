@@ -0,0 +1,146 @@
+from typing import List, Tuple, Union
+
+from server.apps.periodic_tasks.services.lease import Lease
+from server.bot.cache.client import get_redis
+
+
+# Часть рассылки - диапазон первичных ключей пользователей (first_pk, last_pk) включительно
+Chunk = Tuple[int, int]
+
+
+class BroadcastCheckpoint:
+    """Контрольная точка рассылки в Redis.
+
+    Хранит курсор планирования (последний pk, попавший в запланированные части),
+    состояние каждой части и множество пользователей, которым рассылка уже отправлена.
+    По ней перезапущенная рассылка продолжает работу без повторной отправки.
+    """
+
+    TTL = 60 * 60 * 24 * 7
+    # Срок аренды части и планировщика: продлевается во время работы, после падения
+    # воркера работу можно продолжить через этот срок
+    LEASE_TTL = 5 * 60
+
+    PENDING = "pending"
+    DONE = "done"
+
+    def __init__(self, broadcast_id: Union[int, str], client=None):
+        """Инициализация параметров. broadcast_id - id рассылки или идентификатор рассылки файла."""
+        self.client = client or get_redis()
+        self.prefix = f"broadcast:{broadcast_id}"
+        self.state_key = f"{self.prefix}:state"
+        self.chunks_key = f"{self.prefix}:chunks"
+        self.sent_key = f"{self.prefix}:sent"
+
+    @property
+    def cursor(self) -> int:
+        """Последний pk пользователя, вошедший в запланированные части рассылки."""
+        return int(self.client.hget(self.state_key, "cursor") or 0)
+
+    @property
+    def is_planned(self) -> bool:
+        """Все части рассылки запланированы."""
+        return bool(self.client.hget(self.state_key, "planned"))
+
+    def add_chunk(self, chunk: Chunk) -> None:
+        """Запись запланированной части и сдвиг курсора."""
+        pipeline = self.client.pipeline()
+        pipeline.hset(self.chunks_key, self._chunk_id(chunk), self.PENDING)
+        pipeline.hset(self.state_key, "cursor", chunk[1])
+        self._expire(pipeline)
+        pipeline.execute()
+
+    def finish_planning(self) -> None:
+        """Отметка о том, что все части рассылки запланированы."""
+        pipeline = self.client.pipeline()
+        pipeline.hset(self.state_key, "planned", 1)
+        self._expire(pipeline)
+        pipeline.execute()
+
+    def pending_chunks(self) -> List[Chunk]:
+        """Запланированные, но не завершённые части рассылки."""
+        return [
+            self._parse_chunk_id(chunk_id)
+            for chunk_id, status in self.client.hgetall(self.chunks_key).items()
+            if status == self.PENDING
+        ]
+
+    def is_chunk_done(self, chunk: Chunk) -> bool:
+        """Отправка части рассылки завершена."""
+        return self.client.hget(self.chunks_key, self._chunk_id(chunk)) == self.DONE
+
+    def chunk_lease(self, chunk: Chunk) -> Lease:
+        """Аренда части рассылки, чтобы её не отправляли одновременно два воркера."""
+        return Lease(f"{self.prefix}:lock:{self._chunk_id(chunk)}", self.LEASE_TTL, self.client)
+
+    def planner_lease(self) -> Lease:
+        """Аренда планирования рассылки, чтобы её не планировали одновременно два воркера."""
+        return Lease(f"{self.prefix}:planner", self.LEASE_TTL, self.client)
+
+    def complete_chunk(self, chunk: Chunk, sent: int = 0) -> None:
+        """Отметка о завершении отправки части рассылки и учёт успешно отправленных в ней сообщений."""
+        pipeline = self.client.pipeline()
+        pipeline.hset(self.chunks_key, self._chunk_id(chunk), self.DONE)
+        pipeline.hincrby(self.state_key, "sent", sent)
+        pipeline.execute()
+
+    def add_retry(self, count: int) -> None:
+        """Учёт пользователей, отправка которым отложена до повторной попытки."""
+        pipeline = self.client.pipeline()
+        pipeline.hincrby(self.state_key, "retrying", count)
+        self._expire(pipeline)
+        pipeline.execute()
+
+    def complete_retry(self, count: int, sent: int = 0) -> None:
+        """Отметка о завершении повторной попытки и учёт успешно отправленных в ней сообщений."""
+        pipeline = self.client.pipeline()
+        pipeline.hincrby(self.state_key, "retrying", -count)
+        pipeline.hincrby(self.state_key, "sent", sent)
+        pipeline.execute()
+
+    @property
+    def sent_count(self) -> int:
+        """Число успешно отправленных сообщений во всех завершённых частях."""
+        return int(self.client.hget(self.state_key, "sent") or 0)
+
+    def claim_report(self) -> bool:
+        """Проверка, что рассылка завершена, с захватом права отправить итоговый отчёт.
+
+        Возвращает True только одному вызывающему, даже если последние части
+        и планирование завершились одновременно. Пока есть отложенные повторные
+        попытки, рассылка не считается завершённой.
+        """
+        pipeline = self.client.pipeline()
+        pipeline.hmget(self.state_key, "planned", "retrying")
+        pipeline.hvals(self.chunks_key)
+        (is_planned, retrying), statuses = pipeline.execute()
+        if not is_planned or int(retrying or 0) > 0 or any(status != self.DONE for status in statuses):
+            return False
+        return bool(self.client.hsetnx(self.state_key, "reported", 1))
+
+    def filter_unsent(self, telegram_ids: List[int]) -> List[int]:
+        """Пользователи из списка, которым рассылка ещё не отправлялась."""
+        pipeline = self.client.pipeline()
+        for telegram_id in telegram_ids:
+            pipeline.sismember(self.sent_key, telegram_id)
+        return [telegram_id for telegram_id, is_sent in zip(telegram_ids, pipeline.execute()) if not is_sent]
+
+    def mark_sent(self, telegram_id: int) -> None:
+        """Отметка об отправке рассылки пользователю."""
+        pipeline = self.client.pipeline()
+        pipeline.sadd(self.sent_key, telegram_id)
+        pipeline.expire(self.sent_key, self.TTL)
+        pipeline.execute()
+
+    def _expire(self, pipeline) -> None:
+        for key in (self.state_key, self.chunks_key, self.sent_key):
+            pipeline.expire(key, self.TTL)
+
+    @staticmethod
+    def _chunk_id(chunk: Chunk) -> str:
+        return f"{chunk[0]}-{chunk[1]}"
+
+    @staticmethod
+    def _parse_chunk_id(chunk_id: str) -> Chunk:
+        first_pk, last_pk = chunk_id.split("-")
+        return int(first_pk), int(last_pk)
@@ -0,0 +1,52 @@
+from typing import Optional, Set
+
+from server.apps.users.models import BotUser
+from server.bot.cache.client import get_redis
+
+
+class BlockedUsersCollector:
+    """Класс-сервис сбора пользователей, недоступных для отправки сообщений.
+
+    Пользователи сразу публикуются в множество Redis этой рассылки, чтобы параллельно
+    работающие части той же рассылки пропускали их, а в базе деактивируются одним
+    запросом при вызове flush или выходе из контекстного менеджера. Множество своё
+    у каждой рассылки, поэтому пользователь, снова активированный администратором,
+    получит следующую рассылку. Без ключа пользователи собираются только в памяти.
+    """
+
+    TTL = 60 * 60 * 24
+
+    def __init__(self, key: Optional[str], client=None):
+        """Инициализация параметров. key - ключ множества недоступных пользователей рассылки."""
+        self.client = client or get_redis()
+        self.key = key
+        self.telegram_ids: Set[int] = set()
+
+    def add(self, telegram_id: int) -> None:
+        """Добавление пользователя в список на деактивацию."""
+        self.telegram_ids.add(telegram_id)
+        if not self.key:
+            return
+        pipeline = self.client.pipeline()
+        pipeline.sadd(self.key, telegram_id)
+        pipeline.expire(self.key, self.TTL)
+        pipeline.execute()
+
+    def is_blocked(self, telegram_id: int) -> bool:
+        """Проверка, что пользователь уже найден недоступным в этой или другой части рассылки."""
+        if telegram_id in self.telegram_ids:
+            return True
+        return bool(self.key) and bool(self.client.sismember(self.key, telegram_id))
+
+    def flush(self) -> None:
+        """Деактивация собранных пользователей одним запросом."""
+        if not self.telegram_ids:
+            return
+        telegram_ids, self.telegram_ids = self.telegram_ids, set()
+        BotUser.objects.filter(telegram_id__in=telegram_ids).update(is_active=False)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.flush()
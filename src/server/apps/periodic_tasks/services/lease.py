@@ -0,0 +1,71 @@
+import time
+from typing import Optional
+from uuid import uuid4
+
+from server.bot.cache.client import get_redis
+
+
+# Продление и снятие аренды только её владельцем: значение ключа сравнивается с токеном
+RENEW_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class LeaseLostError(Exception):
+    """Аренда истекла и могла быть захвачена другим воркером."""
+
+
+class LeaseHeldError(Exception):
+    """Аренда принадлежит другому воркеру, работа ещё не завершена."""
+
+
+class Lease:
+    """Аренда в Redis - блокировка с ограниченным сроком действия.
+
+    Владелец продлевает аренду, пока выполняет работу (renew_if_due). Если воркер
+    упал, аренда истекает через ttl секунд, и работу подхватывает другой воркер.
+    Продлить и снять аренду может только владелец, поэтому воркер, чья аренда
+    истекла, не снимет аренду, захваченную после него.
+    """
+
+    def __init__(self, key: str, ttl: int, client=None):
+        """Инициализация параметров."""
+        self.client = client or get_redis()
+        self.key = key
+        self.ttl = ttl
+        self.token = uuid4().hex
+        self.renewed_at: Optional[float] = None
+        self.renew_script = self.client.register_script(RENEW_SCRIPT)
+        self.release_script = self.client.register_script(RELEASE_SCRIPT)
+
+    def acquire(self) -> bool:
+        """Захват аренды. Возвращает False, если аренда принадлежит другому владельцу."""
+        if not self.client.set(self.key, self.token, nx=True, px=self.ttl * 1000):
+            return False
+        self.renewed_at = time.monotonic()
+        return True
+
+    def renew_if_due(self) -> None:
+        """Продление аренды, если с прошлого продления прошла треть срока.
+
+        Если аренда уже истекла, выбрасывает LeaseLostError, чтобы владелец прекратил работу.
+        """
+        if time.monotonic() - self.renewed_at < self.ttl / 3:
+            return
+        if not self.renew_script(keys=[self.key], args=[self.token, self.ttl * 1000]):
+            raise LeaseLostError(f"Аренда {self.key} истекла")
+        self.renewed_at = time.monotonic()
+
+    def release(self) -> None:
+        """Снятие аренды, если она всё ещё принадлежит владельцу."""
+        self.release_script(keys=[self.key], args=[self.token])
@@ -0,0 +1,115 @@
+from dataclasses import asdict, dataclass, field
+import json
+from typing import Callable, List, Optional
+
+from django.apps import apps
+from django.db import models
+
+from server.apps.periodic_tasks.helpers import media_is_video
+from server.bot.cache.client import get_redis
+
+
+@dataclass
+class PlanMedia:
+    """Медиа-файл плана отправки."""
+
+    model: str
+    pk: int
+    path: str
+    is_video: bool
+    file_id: Optional[str] = None
+
+
+@dataclass
+class SendPlan:
+    """Подготовленные данные сообщения, общие для всех получателей рассылки или шага сценария.
+
+    Собирается один раз и хранится в Redis под ключом, включающим время изменения объекта,
+    поэтому изменение рассылки в админке приводит к сборке нового плана.
+    """
+
+    TEXT = "text"
+    SINGLE = "single"
+    GROUP = "group"
+    VIDEO_NOTE = "video_note"
+    VOICE = "voice"
+
+    TTL = 60 * 60 * 24
+
+    cache_key: str
+    text: Optional[str]
+    keyboard: Optional[str]
+    media: List[PlanMedia] = field(default_factory=list)
+    message_type: Optional[str] = None
+
+    @property
+    def kind(self) -> str:
+        """Вид сообщения: только текст, одно медиа, медиа-группа, кружок или голосовое."""
+        if self.message_type:
+            return self.message_type
+        if len(self.media) > 1:
+            return self.GROUP
+        if self.media:
+            return self.SINGLE
+        return self.TEXT
+
+    @classmethod
+    def get(cls, instance: models.Model, build: Callable[[str], "SendPlan"], client=None) -> "SendPlan":
+        """Получение плана объекта из кеша или его сборка через build при отсутствии."""
+        client = client or get_redis()
+        cache_key = cls.make_cache_key(instance)
+        cached = client.get(cache_key)
+        if cached:
+            data = json.loads(cached)
+            data["media"] = [PlanMedia(**media) for media in data["media"]]
+            return cls(**data)
+
+        plan = build(cache_key)
+        plan.save(client)
+        return plan
+
+    @classmethod
+    def build(cls, cache_key: str, text: Optional[str], keyboard, media_files) -> "SendPlan":
+        """Сборка плана из текста, клавиатуры и медиа-файлов объекта."""
+        return cls(
+            cache_key=cache_key,
+            text=text,
+            keyboard=keyboard.to_json(),
+            media=[
+                PlanMedia(
+                    model=media_instance._meta.label_lower,
+                    pk=media_instance.pk,
+                    path=media_instance.media.path,
+                    is_video=media_is_video(media_instance.media.path),
+                    file_id=media_instance.file_id,
+                )
+                for media_instance in media_files
+            ],
+        )
+
+    @classmethod
+    def for_file(cls, message_type: str, file_id: str) -> "SendPlan":
+        """План отправки кружка или голосового сообщения, уже загруженного в Telegram."""
+        return cls(
+            cache_key="",
+            text=None,
+            keyboard=None,
+            media=[PlanMedia(model="", pk=0, path="", is_video=False, file_id=file_id)],
+            message_type=message_type,
+        )
+
+    @staticmethod
+    def make_cache_key(instance: models.Model) -> str:
+        return f"send_plan:{instance._meta.label_lower}:{instance.pk}:{instance.updated_at.timestamp()}"
+
+    def save(self, client=None) -> None:
+        """Сохранение плана в кеш."""
+        (client or get_redis()).set(self.cache_key, json.dumps(asdict(self)), ex=self.TTL)
+
+    def save_file_ids(self, media: List[PlanMedia], client=None) -> None:
+        """Сохранение изменившихся file_id медиа-файлов в базе и в кешированном плане."""
+        if not media:
+            return
+        for media_item in media:
+            apps.get_model(media_item.model).objects.filter(pk=media_item.pk).update(file_id=media_item.file_id)
+        self.save(client)
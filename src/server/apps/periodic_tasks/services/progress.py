@@ -0,0 +1,125 @@
+from collections import Counter
+import time
+from typing import Dict, Optional
+
+from django.conf import settings
+
+from server.bot.cache.client import get_redis
+
+
+class BroadcastProgress:
+    """Ход рассылки в Redis для отображения в админке.
+
+    Задачи отправки накапливают результаты в памяти и записывают их не чаще раза
+    в flush_interval секунд одним конвейером запросов. Скорость считается по счётчикам
+    отправок за каждую секунду, которые хранятся в отдельных ключах с коротким TTL.
+    Чтение состояния - один конвейер из трёх запросов, поэтому опрос из админки
+    не создаёт заметной нагрузки на Redis.
+    """
+
+    TTL = 60 * 60 * 24 * 7
+    RATE_KEY_TTL = 120
+
+    def __init__(
+            self,
+            mailing_id: int,
+            flush_interval: float = settings.BROADCAST_PROGRESS_FLUSH_INTERVAL,
+            rate_window: int = settings.BROADCAST_PROGRESS_RATE_WINDOW,
+            client=None,
+    ):
+        """Инициализация параметров."""
+        self.client = client or get_redis()
+        self.flush_interval = flush_interval
+        self.rate_window = rate_window
+        self.prefix = f"broadcast:{mailing_id}:progress"
+        self.counters_key = self.prefix
+        self.errors_key = f"{self.prefix}:errors"
+        self.counters = Counter()
+        self.errors = Counter()
+        self.rates = Counter()
+        self.flushed_at = time.monotonic()
+
+    def start(self, total: int) -> None:
+        """Сброс хода рассылки перед началом отправки."""
+        pipeline = self.client.pipeline()
+        pipeline.delete(self.counters_key, self.errors_key)
+        pipeline.hset(self.counters_key, mapping={"total": total, "started_at": int(time.time())})
+        pipeline.expire(self.counters_key, self.TTL)
+        pipeline.execute()
+
+    def add_sent(self) -> None:
+        """Учёт успешной отправки."""
+        self._add("sent")
+
+    def add_error(self, error: Exception, blocked: bool) -> None:
+        """Учёт ошибки отправки с кодом ошибки Telegram или типом исключения."""
+        self.errors[self._error_code(error)] += 1
+        self._add("blocked" if blocked else "failed")
+
+    def add_retry(self, error: Exception) -> None:
+        """Учёт отправки, отложенной для повторной попытки. В выполненные не входит."""
+        self.errors[self._error_code(error)] += 1
+        self._add("retried")
+
+    def flush(self) -> None:
+        """Запись накопленных результатов в Redis."""
+        self.flushed_at = time.monotonic()
+        if not self.counters:
+            return
+        pipeline = self.client.pipeline(transaction=False)
+        for field, count in self.counters.items():
+            pipeline.hincrby(self.counters_key, field, count)
+        for error_code, count in self.errors.items():
+            pipeline.hincrby(self.errors_key, error_code, count)
+        for second, count in self.rates.items():
+            pipeline.incrby(self._rate_key(second), count)
+            pipeline.expire(self._rate_key(second), self.RATE_KEY_TTL)
+        pipeline.expire(self.counters_key, self.TTL)
+        pipeline.expire(self.errors_key, self.TTL)
+        pipeline.execute()
+        self.counters.clear()
+        self.errors.clear()
+        self.rates.clear()
+
+    def snapshot(self) -> Dict:
+        """Текущее состояние рассылки: выполнено, скорость, ошибки и оценка оставшегося времени."""
+        now = int(time.time())
+        # Текущая секунда ещё не завершена и в расчёт скорости не входит
+        seconds = range(now - self.rate_window, now)
+        pipeline = self.client.pipeline(transaction=False)
+        pipeline.hgetall(self.counters_key)
+        pipeline.hgetall(self.errors_key)
+        pipeline.mget([self._rate_key(second) for second in seconds])
+        counters, errors, rates = pipeline.execute()
+
+        total = int(counters.get("total", 0))
+        sent, failed, blocked = (int(counters.get(field, 0)) for field in ("sent", "failed", "blocked"))
+        done = sent + failed + blocked
+        rate = sum(int(count or 0) for count in rates) / self.rate_window
+        remaining = max(total - done, 0)
+        eta: Optional[int] = int(remaining / rate) if rate else None
+        return {
+            "total": total,
+            "done": done,
+            "sent": sent,
+            "failed": failed,
+            "blocked": blocked,
+            "retried": int(counters.get("retried", 0)),
+            "remaining": remaining,
+            "rate": round(rate, 1),
+            "eta_seconds": eta,
+            "errors": {error_code: int(count) for error_code, count in errors.items()},
+        }
+
+    def _add(self, field: str) -> None:
+        self.counters[field] += 1
+        self.rates[int(time.time())] += 1
+        if time.monotonic() - self.flushed_at >= self.flush_interval:
+            self.flush()
+
+    @staticmethod
+    def _error_code(error: Exception) -> str:
+        return str(getattr(error, "error_code", None) or type(error).__name__)
+
+    def _rate_key(self, second: int) -> str:
+        return f"{self.prefix}:rate:{second}"
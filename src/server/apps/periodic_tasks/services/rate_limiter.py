@@ -0,0 +1,186 @@
+import asyncio
+import time
+from typing import Optional
+
+from django.conf import settings
+
+from server.bot.cache.client import get_async_redis, get_redis
+
+
+# Текущая общая частота с учётом снижения после 429: после снижения до rate она линейно
+# восстанавливается на recovery сообщений в секунду за каждую секунду до настроенной частоты
+ADAPTIVE_RATE = """
+local function adaptive_rate(key, configured, recovery, now)
+    local state = redis.call('HMGET', key, 'rate', 'ts')
+    if not state[1] then
+        return configured
+    end
+    return math.min(configured, tonumber(state[1]) + math.max(0, now - tonumber(state[2])) * recovery / 1000)
+end
+"""
+
+# Атомарная проверка двух корзин токенов: общей для бота и персональной для чата.
+# Токен списывается только если он есть в обеих корзинах, иначе возвращается
+# время ожидания в миллисекундах до появления токена в "самой медленной" корзине.
+# Последний ключ - состояние адаптивной частоты, ограничивающей первую (общую) корзину.
+TOKEN_BUCKET_SCRIPT = ADAPTIVE_RATE + """
+local now = tonumber(ARGV[1])
+local recovery = tonumber(ARGV[#ARGV])
+local wait = 0
+local buckets = {}
+
+for i = 1, #KEYS - 1 do
+    local key = KEYS[i]
+    local rate = tonumber(ARGV[i * 2])
+    local capacity = tonumber(ARGV[i * 2 + 1])
+    if i == 1 then
+        rate = adaptive_rate(KEYS[#KEYS], rate, recovery, now)
+        capacity = math.max(1, math.min(capacity, rate))
+    end
+    local state = redis.call('HMGET', key, 'tokens', 'ts')
+    local tokens = tonumber(state[1]) or capacity
+    local ts = tonumber(state[2]) or now
+    tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate / 1000)
+    if tokens < 1 then
+        wait = math.max(wait, math.ceil((1 - tokens) * 1000 / rate))
+    end
+    buckets[i] = {key, tokens, rate, capacity}
+end
+
+for _, bucket in ipairs(buckets) do
+    local tokens = bucket[2]
+    if wait == 0 then
+        tokens = tokens - 1
+    end
+    redis.call('HSET', bucket[1], 'tokens', tokens, 'ts', now)
+    redis.call('PEXPIRE', bucket[1], math.ceil(bucket[4] * 1000 / bucket[3]) + 1000)
+end
+
+return wait
+"""
+
+# Мультипликативное снижение общей частоты после 429. Повторные 429 в течение cooldown
+# миллисекунд после снижения (ответы на уже отправленные запросы) частоту не снижают.
+# Возвращает новую частоту.
+THROTTLE_SCRIPT = ADAPTIVE_RATE + """
+local now = tonumber(ARGV[1])
+local configured = tonumber(ARGV[2])
+local recovery = tonumber(ARGV[3])
+local factor = tonumber(ARGV[4])
+local min_rate = tonumber(ARGV[5])
+local cooldown = tonumber(ARGV[6])
+
+local rate = adaptive_rate(KEYS[1], configured, recovery, now)
+local ts = tonumber(redis.call('HGET', KEYS[1], 'ts'))
+if ts and now - ts < cooldown then
+    return tostring(rate)
+end
+
+rate = math.max(min_rate, rate * factor)
+redis.call('HSET', KEYS[1], 'rate', rate, 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil((configured - rate) * 1000 / recovery) + 1000)
+return tostring(rate)
+"""
+
+
+class RateLimiter:
+    """Распределённый ограничитель частоты отправки сообщений (token bucket в Redis).
+
+    Общая корзина разделяется всеми воркерами Celery, корзина типа трафика (traffic)
+    ограничивает его долю общей частоты из BROADCAST_TRAFFIC_RATES, персональная корзина
+    ограничивает частоту сообщений в один чат, допуская короткую серию из chat_burst сообщений. После 429 общая частота снижается
+    в throttle_factor раз (throttle) и затем постепенно восстанавливается (AIMD),
+    так что все воркеры сразу замедляются и снова разгоняются без ручной настройки.
+    """
+
+    GLOBAL_KEY = "rate_limit:global"
+    TRAFFIC_KEY = "rate_limit:traffic:{traffic}"
+    CHAT_KEY = "rate_limit:chat:{chat_id}"
+    ADAPTIVE_KEY = "rate_limit:global:adaptive"
+    THROTTLE_COOLDOWN_MS = 1000
+
+    def __init__(
+            self,
+            global_rate: float = settings.BROADCAST_GLOBAL_RATE,
+            chat_rate: float = settings.BROADCAST_CHAT_RATE,
+            client=None,
+            traffic: Optional[str] = None,
+            chat_burst: int = settings.BROADCAST_CHAT_BURST,
+    ):
+        """Инициализация параметров. chat_burst - ёмкость персональной корзины чата."""
+        self.global_rate = global_rate
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.traffic = traffic
+        self.traffic_rate = settings.BROADCAST_TRAFFIC_RATES.get(traffic)
+        client = client or get_redis()
+        self.script = client.register_script(TOKEN_BUCKET_SCRIPT)
+        self.throttle_script = client.register_script(THROTTLE_SCRIPT)
+
+    def acquire(self, chat_id: int) -> None:
+        """Ожидание свободного токена для отправки сообщения в чат."""
+        while True:
+            wait_ms = int(self.script(**self._script_params(chat_id)))
+            if not wait_ms:
+                return
+            time.sleep(wait_ms / 1000)
+
+    def throttle(self) -> float:
+        """Снижение общей частоты отправки после 429. Возвращает новую частоту."""
+        return float(self.throttle_script(**self._throttle_params()))
+
+    def _script_params(self, chat_id: int) -> dict:
+        """Ключи и аргументы скрипта списания токена."""
+        keys = [self.GLOBAL_KEY]
+        args = [int(time.time() * 1000), self.global_rate, self.global_rate]
+        if self.traffic_rate:
+            keys.append(self.TRAFFIC_KEY.format(traffic=self.traffic))
+            args.extend([self.traffic_rate, self.traffic_rate])
+        keys.extend([self.CHAT_KEY.format(chat_id=chat_id), self.ADAPTIVE_KEY])
+        args.extend([self.chat_rate, self.chat_burst, settings.BROADCAST_RATE_RECOVERY])
+        return {"keys": keys, "args": args}
+
+    def _throttle_params(self) -> dict:
+        """Ключи и аргументы скрипта снижения общей частоты."""
+        return {
+            "keys": [self.ADAPTIVE_KEY],
+            "args": [
+                int(time.time() * 1000),
+                self.global_rate,
+                settings.BROADCAST_RATE_RECOVERY,
+                settings.BROADCAST_THROTTLE_FACTOR,
+                settings.BROADCAST_MIN_RATE,
+                self.THROTTLE_COOLDOWN_MS,
+            ],
+        }
+
+
+class AsyncRateLimiter(RateLimiter):
+    """Асинхронный вариант ограничителя частоты отправки, использующий те же корзины в Redis."""
+
+    def __init__(
+            self,
+            global_rate: float = settings.BROADCAST_GLOBAL_RATE,
+            chat_rate: float = settings.BROADCAST_CHAT_RATE,
+            client=None,
+            traffic: Optional[str] = None,
+    ):
+        """Инициализация параметров. Клиент должен быть создан в том же цикле событий."""
+        self.client = client or get_async_redis()
+        super().__init__(global_rate, chat_rate, self.client, traffic)
+
+    async def acquire(self, chat_id: int) -> None:
+        """Ожидание свободного токена для отправки сообщения в чат."""
+        while True:
+            wait_ms = int(await self.script(**self._script_params(chat_id)))
+            if not wait_ms:
+                return
+            await asyncio.sleep(wait_ms / 1000)
+
+    async def throttle(self) -> float:
+        """Снижение общей частоты отправки после 429. Возвращает новую частоту."""
+        return float(await self.throttle_script(**self._throttle_params()))
+
+    async def close(self) -> None:
+        """Закрытие соединений с Redis."""
+        await self.client.aclose()
@@ -0,0 +1,61 @@
+from datetime import datetime, timedelta
+from typing import Iterator, List, Tuple
+
+from django.db import connection
+from django.db.models import Exists, OuterRef
+
+from server.apps.mailing.models import Scenario, UserScenarioMailing
+from server.apps.periodic_tasks.services.audience import Audience
+from server.apps.users.models import BotUser
+
+
+class ScenarioDispatcher:
+    """Класс-сервис поиска пользователей, которым пора отправить шаги сценария."""
+
+    def __init__(self, scenario: Scenario):
+        """Инициализация параметров."""
+        self.scenario = scenario
+
+    def iter_pending_users(self, now: datetime) -> Iterator[List[Tuple[int, int]]]:
+        """Страницы пар (id, telegram_id) пользователей, ещё не получавших сценарий.
+
+        Каждая страница выбирается одним запросом с анти-соединением по отправленным шагам сценария.
+        """
+        cutoff_time = now - timedelta(hours=self.scenario.trigger_delay_hours)
+        received = UserScenarioMailing.objects.filter(
+            user=OuterRef("pk"),
+            scenario__scenario=self.scenario,
+        )
+        users = (
+            BotUser.objects.filter(created_at__lte=cutoff_time, is_active=True)
+            .filter(~Exists(received))
+        )
+        return Audience(users).iter_pages()
+
+
+def claim_scenario_step(step_id: int, telegram_ids: List[int]) -> List[int]:
+    """Захват шага сценария для активных пользователей из списка. Возвращает их Telegram ID.
+
+    Запись UserScenarioMailing создаётся до отправки одним запросом INSERT ... ON CONFLICT
+    DO NOTHING RETURNING: пользователи, шаг которым уже захвачен (повторной или параллельной
+    задачей), пропускаются, поэтому шаг не отправляется дважды. Запись первого шага
+    исключает пользователя из следующих поисков диспетчера.
+    """
+    users = dict(
+        BotUser.objects.filter(telegram_id__in=telegram_ids, is_active=True).values_list("id", "telegram_id")
+    )
+    if not users:
+        return []
+    meta = UserScenarioMailing._meta
+    user_column = connection.ops.quote_name(meta.get_field("user").column)
+    step_column = connection.ops.quote_name(meta.get_field("scenario").column)
+    # bulk_create с ignore_conflicts не сообщает, какие строки вставлены, поэтому RETURNING
+    sql = (
+        f"INSERT INTO {connection.ops.quote_name(meta.db_table)} ({user_column}, {step_column}) "
+        f"VALUES {', '.join(['(%s, %s)'] * len(users))} "
+        f"ON CONFLICT ({user_column}, {step_column}) DO NOTHING RETURNING {user_column}"
+    )
+    params = [value for user_id in users for value in (user_id, step_id)]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [users[row[0]] for row in cursor.fetchall()]
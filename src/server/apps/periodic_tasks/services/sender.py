@@ -0,0 +1,213 @@
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Callable, Iterator, List, Optional, Sequence, Tuple
+
+from loguru import logger
+from telebot import apihelper
+from telebot.types import InputMediaPhoto, InputMediaVideo, Message
+
+from server.apps.periodic_tasks.helpers import (
+    TELEGRAM_API_EXCEPTIONS,
+    UnreachableUserError,
+    is_flood_error,
+)
+from server.apps.periodic_tasks.services.plan import PlanMedia, SendPlan
+from server.apps.periodic_tasks.services.rate_limiter import RateLimiter
+from server.bot.main import bot
+
+
+# Фрагменты описаний ошибок Telegram, означающих, что сохранённый file_id больше не принимается
+INVALID_FILE_ID_ERRORS = (
+    "wrong file identifier",
+    "wrong remote file identifier",
+    "file reference expired",
+    "failed to get HTTP URL content",
+)
+
+# Результат отправки пользователю: Telegram ID и ошибка (None при успешной отправке)
+SendResult = Tuple[int, Optional[Exception]]
+
+
+class BaseMessageSender(ABC):
+    """Базовый класс отправки сообщения по плану отправки.
+
+    Медиа-файл загружается в Telegram только при первой отправке, полученный file_id
+    сохраняется в модели медиа и плане и используется для всех последующих отправок.
+    """
+
+    @abstractmethod
+    def send_many(
+            self,
+            telegram_ids: Sequence[int],
+            plan: SendPlan,
+            skip: Callable[[int], bool],
+            heartbeat: Optional[Callable[[], None]] = None,
+            on_delivered: Optional[Callable[[int], None]] = None,
+    ) -> Iterator[SendResult]:
+        """Отправка сообщения списку пользователей.
+
+        Пользователям, для которых skip вернул True, сообщение не отправляется,
+        а результатом возвращается UnreachableUserError. heartbeat вызывается перед
+        каждой отправкой: если он выбросил исключение, отправка прекращается, и оно
+        пробрасывается после результатов уже выполненных отправок. on_delivered вызывается
+        сразу после доставки, до возврата результата, с Telegram ID получателя.
+        """
+
+    @classmethod
+    def _build_media_group(cls, plan: SendPlan, opened_files: list) -> list:
+        """Формирование медиа-группы из медиа-файлов плана."""
+        media_group = []
+        for media_item in plan.media:
+            media = cls._get_input_file(media_item, opened_files)
+            if media_item.is_video:
+                media_group.append(InputMediaVideo(media, caption=plan.text))
+            else:
+                media_group.append(InputMediaPhoto(media, caption=plan.text))
+        return media_group
+
+    @staticmethod
+    def _get_input_file(media_item: PlanMedia, opened_files: list):
+        """Получение file_id медиа-файла или открытого файла для загрузки в Telegram."""
+        if media_item.file_id:
+            return media_item.file_id
+        file = Path(media_item.path).open(mode='rb')
+        opened_files.append(file)
+        return file
+
+    @staticmethod
+    def _remember_file_ids(media: List[PlanMedia], messages: List[Message]) -> List[PlanMedia]:
+        """Запоминание file_id загруженных медиа-файлов. Возвращает изменённые медиа-файлы."""
+        changed = []
+        for media_item, message in zip(media, messages):
+            if media_item.file_id:
+                continue
+            if message.video:
+                media_item.file_id = message.video.file_id
+            elif message.photo:
+                media_item.file_id = message.photo[-1].file_id
+            else:
+                continue
+            changed.append(media_item)
+        return changed
+
+    @staticmethod
+    def _is_invalid_file_id(exception: Exception, plan: SendPlan) -> bool:
+        """Проверка, что ошибка Telegram вызвана недействительным сохранённым file_id."""
+        if not isinstance(exception, TELEGRAM_API_EXCEPTIONS) or exception.error_code != 400:
+            return False
+        # Файл кружка или голосового сообщения не хранится у нас и не может быть загружен заново
+        if plan.message_type or not any(media_item.file_id for media_item in plan.media):
+            return False
+        description = exception.description or ""
+        return any(error in description for error in INVALID_FILE_ID_ERRORS)
+
+    @staticmethod
+    def _reset_file_ids(plan: SendPlan) -> List[PlanMedia]:
+        """Сброс сохранённых file_id для повторной загрузки. Возвращает изменённые медиа-файлы."""
+        logger.warning("Telegram отклонил сохранённый file_id, загружаем медиа заново")
+        changed = [media_item for media_item in plan.media if media_item.file_id]
+        for media_item in changed:
+            media_item.file_id = None
+        return changed
+
+
+class MessageSender(BaseMessageSender):
+    """Класс-сервис последовательной отправки сообщений с учётом лимитов Telegram.
+
+    После 429 общая частота отправки снижается сразу, до отправки остальной части.
+    """
+
+    def __init__(self, limiter: Optional[RateLimiter] = None, traffic: Optional[str] = None):
+        """Инициализация параметров. traffic - тип трафика для доли общей частоты отправки."""
+        self.limiter = limiter or RateLimiter(traffic=traffic)
+
+    def send_many(
+            self,
+            telegram_ids: Sequence[int],
+            plan: SendPlan,
+            skip: Callable[[int], bool],
+            heartbeat: Optional[Callable[[], None]] = None,
+            on_delivered: Optional[Callable[[int], None]] = None,
+    ) -> Iterator[SendResult]:
+        for telegram_id in telegram_ids:
+            if skip(telegram_id):
+                yield telegram_id, UnreachableUserError(telegram_id)
+                continue
+            if heartbeat:
+                heartbeat()
+            try:
+                self.send(telegram_id, plan)
+            except Exception as err:
+                if is_flood_error(err):
+                    self.limiter.throttle()
+                yield telegram_id, err
+            else:
+                if on_delivered:
+                    on_delivered(telegram_id)
+                yield telegram_id, None
+
+    def send(self, chat_id: int, plan: SendPlan) -> None:
+        """Отправка сообщения. Исключения Telegram API пробрасываются вызывающему коду."""
+        try:
+            self._send(chat_id, plan)
+        except apihelper.ApiTelegramException as e:
+            if not self._is_invalid_file_id(e, plan):
+                raise
+            plan.save_file_ids(self._reset_file_ids(plan))
+            self._send(chat_id, plan)
+
+    def _send(self, chat_id: int, plan: SendPlan) -> None:
+        """Отправка сообщения с подстановкой сохранённых file_id вместо содержимого файлов."""
+        opened_files = []
+        try:
+            if plan.kind == SendPlan.GROUP:
+                # Поскольку в тг есть ограничение, что с медиа группой нельзя отправить кнопки,
+                # то отправляем двумя сообщениями
+                media_group = self._build_media_group(plan, opened_files)
+                self.limiter.acquire(chat_id)
+                messages = bot.send_media_group(
+                    chat_id=chat_id,
+                    media=media_group
+                )
+                plan.save_file_ids(self._remember_file_ids(plan.media, messages))
+                self.limiter.acquire(chat_id)
+                bot.send_message(
+                    chat_id=chat_id,
+                    text=plan.text,
+                    reply_markup=plan.keyboard
+                )
+            elif plan.kind == SendPlan.SINGLE:
+                media_item = plan.media[0]
+                media = self._get_input_file(media_item, opened_files)
+                self.limiter.acquire(chat_id)
+                if media_item.is_video:
+                    message = bot.send_video(
+                        chat_id=chat_id,
+                        video=media,
+                        caption=plan.text,
+                        reply_markup=plan.keyboard
+                    )
+                else:
+                    message = bot.send_photo(
+                        chat_id=chat_id,
+                        photo=media,
+                        caption=plan.text,
+                        reply_markup=plan.keyboard
+                    )
+                plan.save_file_ids(self._remember_file_ids(plan.media, [message]))
+            elif plan.kind == SendPlan.VIDEO_NOTE:
+                self.limiter.acquire(chat_id)
+                bot.send_video_note(chat_id, plan.media[0].file_id)
+            elif plan.kind == SendPlan.VOICE:
+                self.limiter.acquire(chat_id)
+                bot.send_voice(chat_id, plan.media[0].file_id)
+            else:
+                self.limiter.acquire(chat_id)
+                bot.send_message(
+                    chat_id=chat_id,
+                    text=plan.text,
+                    reply_markup=plan.keyboard
+                )
+        finally:
+            for file in opened_files:
+                file.close()
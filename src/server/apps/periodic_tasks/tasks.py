@@ -1,114 +1,95 @@
 from datetime import timedelta
-from pathlib import Path
 import time
+from typing import List, Optional
+from uuid import uuid4
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F, Prefetch, Q
 from django.utils import timezone
 from loguru import logger
-from telebot import apihelper
-from telebot.types import InputMediaPhoto, InputMediaVideo
 
 from server import celery_app
-from server.apps.mailing.enums import SendingStatus
-from server.apps.mailing.models import (
-    Mailing,
-    MailingLog,
-    Scenario,
-    ScenarioStep,
-    UserScenarioMailing,
+from server.apps.mailing.models import Mailing, Scenario, ScenarioStep
+from server.apps.periodic_tasks.services.audience import Audience
+from server.apps.periodic_tasks.services.broadcast import (
+    FileBroadcast,
+    MailingBroadcast,
+    ScenarioStepBroadcast,
+)
+from server.apps.periodic_tasks.services.checkpoint import BroadcastCheckpoint
+from server.apps.periodic_tasks.services.lease import (
+    Lease,
+    LeaseHeldError,
+    LeaseLostError,
+)
+from server.apps.periodic_tasks.services.plan import SendPlan
+from server.apps.periodic_tasks.services.scenario import (
+    ScenarioDispatcher,
+    claim_scenario_step,
 )
-from server.apps.periodic_tasks.helpers import except_telegram_exception, media_is_video
-from server.apps.users.models import BotUser
 from server.bot.main import bot
-from server.bot.utils.keyboards import KeyboardConstructor
 
 
 User = get_user_model()
 
+# Итоговые отчёты администратору о рассылке файлов
+FILE_BROADCAST_REPORTS = {
+    SendPlan.VIDEO_NOTE: "✅ Кружок получили {sent_count} человек",
+    SendPlan.VOICE: "✅ Голосовое сообщение получили {sent_count} человек",
+}
 
-@celery_app.app.task
-def send_user_step(telegram_id: int, step_id: int) -> None:
-    """Задача отправки шага сценария пользователю."""
-    step = ScenarioStep.objects.get(id=step_id)
-    media_files = step.media_files.all()
-    user = BotUser.objects.get(telegram_id=telegram_id)
-    if UserScenarioMailing.objects.filter(user=user, scenario=step).exists():
-        return
-    UserScenarioMailing.objects.create(user=user, scenario=step)
-
-    if step.delay_seconds:
-        time.sleep(step.delay_seconds)
-
-    data = {}
-    is_button_used = False
-    if step.button_text and step.button_url:
-        is_button_used = True
-
-    if is_button_used:
-        data = {step.button_text: step.button_url}
-
-    keyboard = KeyboardConstructor().create_mixed_keyboard(url_data=data)
 
+@celery_app.app.task
+def send_scenario_step(
+        step_ids: List[int],
+        telegram_ids: List[int],
+        attempt: int = 0,
+        send_at: Optional[float] = None,
+) -> None:
+    """Задача отправки шагов сценария step_ids по очереди части пользователей.
+
+    Первый запуск задачи шага захватывает шаг для пользователей и откладывает отправку
+    на delay_seconds шага: повторно поставленная задача того же шага пользователей
+    не захватит и ничего им не отправит. send_at - время отправки уже захваченного шага,
+    до которого задача откладывает себя не дольше SCENARIO_STEP_MAX_COUNTDOWN за раз.
+    После отправки задача ставит себя в очередь со следующими шагами для пользователей,
+    которые его получили. Отложенным пользователям повторяется тот же шаг, и остальные шаги
+    они получают после повтора. attempt - номер повторной попытки.
+    Ошибки не пробрасываются, а записываются в лог.
+    """
+    if isinstance(step_ids, int):
+        # Задачи, поставленные в очередь до перехода на список шагов, шаг уже записали
+        step_ids, send_at = [step_ids], 0
+    step_id, next_step_ids = step_ids[0], step_ids[1:]
     try:
-        if media_files.exists():
-            if media_files.count() > 1:
-                # Поскольку в тг есть ограничение, что с медиа группой нельзя отправить кнопки,
-                # то отправляем двумя сообщениями, если есть кнопка
-                media_group = []
-                for media_instance in media_files.all():
-                    if media_is_video(media_instance.media.path):
-                        media_group.append(
-                            InputMediaVideo(
-                                Path(media_instance.media.path).open(mode='rb'),
-                                caption=step.text
-                            )
-                        )
-                    else:
-                        media_group.append(
-                            InputMediaPhoto(
-                                Path(media_instance.media.path).open(mode='rb'),
-                                caption=step.text
-                            )
-                        )
-                bot.send_media_group(
-                    chat_id=telegram_id,
-                    media=media_group
-                )
-                bot.send_message(
-                    chat_id=telegram_id,
-                    text=step.text,
-                    reply_markup=keyboard
-                )
-
-            else:
-                media_path = media_files.first().media.path
-                if media_is_video(media_path):
-                    bot.send_video(
-                        chat_id=telegram_id,
-                        video=Path(media_path).open(mode='rb'),
-                        caption=step.text,
-                        reply_markup=keyboard
-                    )
-                else:
-                    bot.send_photo(
-                        chat_id=telegram_id,
-                        photo=Path(media_path).open(mode='rb'),
-                        caption=step.text,
-                        reply_markup=keyboard
-                    )
-        else:
-            bot.send_message(
-                chat_id=telegram_id,
-                text=step.text,
-                reply_markup=keyboard
-            )
-    except apihelper.ApiTelegramException as e:
-        log_message = except_telegram_exception(e, user)
-        logger.error(log_message)
+        step = ScenarioStep.objects.filter(id=step_id).first()
+        if step is None:
+            logger.warning(f"Шаг сценария {step_id} удалён, пользователи переходят к следующему шагу")
+            schedule_scenario_steps(next_step_ids, telegram_ids)
+            return
+        if send_at is None:
+            telegram_ids = claim_scenario_step(step.id, telegram_ids)
+            send_at = time.time() + (step.delay_seconds or 0)
+        if not telegram_ids:
+            return
+        delay = send_at - time.time()
+        if delay > 0:
+            # Длинная задержка ждёт в несколько приёмов: задачу с отсрочкой больше visibility_timeout
+            # брокер выдал бы повторно, и шаг ушёл бы дважды
+            countdown = min(delay, settings.SCENARIO_STEP_MAX_COUNTDOWN)
+            send_scenario_step.si(step_ids, telegram_ids, attempt, send_at).apply_async(countdown=countdown)
+            return
+        ScenarioStepBroadcast(step, next_step_ids, attempt=attempt).send_chunk(telegram_ids)
     except Exception as err:
-        logger.error(f"Возникла ошибка при отправке пользователю {telegram_id} шага сценария {step.id}: {err}")
-    else:
-        logger.success(f"Шаг сценария {step.id} успешно отправлен пользователю {telegram_id}")
+        logger.exception(f"Возникла ошибка при отправке шага сценария {step_id}: {err}")
+
+
+def schedule_scenario_steps(step_ids: List[int], telegram_ids: List[int]) -> None:
+    """Постановка в очередь отправки шагов сценария: задача сразу захватывает первый шаг."""
+    if step_ids and telegram_ids:
+        send_scenario_step.delay(step_ids, telegram_ids)
 
 
 @celery_app.app.task
@@ -116,242 +97,243 @@ def check_scenario_dispatcher() -> None:
     """Задача поиска пользователей, подходящих для рассылки и создания задачи рассылки"""
 
     now = timezone.now()
-    scenarios = Scenario.objects.filter(is_active=True).prefetch_related("steps").all()
+    scenarios = Scenario.objects.filter(is_active=True).prefetch_related(
+        Prefetch("steps", queryset=ScenarioStep.objects.order_by("id"))
+    )
 
     for scenario in scenarios:
         try:
-            cutoff_time = now - timedelta(hours=scenario.trigger_delay_hours)
-
-            steps = scenario.steps.all().order_by("id")
+            steps = list(scenario.steps.all())
 
-            if not steps.exists():
+            if not steps:
                 continue
 
-            for step in steps:
-                users_to_process = BotUser.objects.filter(
-                    created_at__lte=cutoff_time,
-                    is_active=True
-                ).exclude(
-                    scenarios__scenario__scenario=scenario
-                )
-
-                if not users_to_process.exists():
-                    continue
-
-                for user in users_to_process:
-                    send_user_step.delay(user.telegram_id, step.id)
+            dispatcher = ScenarioDispatcher(scenario)
+            for chunk in dispatcher.iter_pending_users(now):
+                # Шаг ждёт delay_seconds в брокере с отсрочкой, воркер при этом не занят. Следующий
+                # шаг ставится в очередь только после отправки предыдущего
+                schedule_scenario_steps([step.id for step in steps], [telegram_id for _, telegram_id in chunk])
 
         except Exception as err:
             logger.exception(f"Возникла ошибка при поиске пользователей для сценария: {err}")
 
 
-@celery_app.app.task
-def send_instant_mailing() -> None:
-    """Задача отправки рассылки со статусом ready_to_send=True и is_instant=True."""
-    mailings = Mailing.objects.filter(ready_to_send=True, is_processed=False, is_instant=True)
-    for mailing in mailings:
-        mailing.is_processed = True
-        mailing.save(update_fields=["is_processed"])
-        is_button_used = False
-        data = {}
-        if mailing.button_text and mailing.button_link:
-            is_button_used = True
-        if is_button_used:
-            data = {mailing.button_text: mailing.button_link}
-        keyboard = KeyboardConstructor().create_mixed_keyboard(url_data=data)
-        subs = BotUser.objects.filter(is_active=True)
-        media_files = mailing.media_files.all()
-
-        for sub in subs:
-            try:
-                if media_files.exists():
-                    if media_files.count() > 1:
-                        media_group = []
-                        for media_instance in media_files.all():
-                            if media_is_video(media_instance.media.path):
-                                media_group.append(
-                                    InputMediaVideo(
-                                        Path(media_instance.media.path).open(mode='rb'),
-                                        caption=mailing.text
-                                    )
-                                )
-                            else:
-                                media_group.append(
-                                    InputMediaPhoto(
-                                        Path(media_instance.media.path).open(mode='rb'),
-                                        caption=mailing.text
-                                    )
-                                )
-                        bot.send_media_group(
-                            chat_id=sub.telegram_id,
-                            media=media_group
-                        )
-                        bot.send_message(
-                            chat_id=sub.telegram_id,
-                            text=mailing.text,
-                            reply_markup=keyboard
-                        )
-                    else:
-                        media_path = media_files.first().media.path
-                        if media_is_video(media_path):
-                            bot.send_video(
-                                chat_id=sub.telegram_id,
-                                video=Path(media_path).open(mode='rb'),
-                                caption=mailing.text,
-                                reply_markup=keyboard
-                            )
-                        else:
-                            bot.send_photo(
-                                chat_id=sub.telegram_id,
-                                photo=Path(media_path).open(mode='rb'),
-                                caption=mailing.text,
-                                reply_markup=keyboard
-                            )
-                else:
-                    bot.send_message(
-                        chat_id=sub.telegram_id,
-                        text=mailing.text,
-                        reply_markup=keyboard
-                    )
-            except apihelper.ApiTelegramException as e:
-                log_message = except_telegram_exception(e, sub)
-                logger.error(log_message)
-                MailingLog.objects.create(mail=mailing, user_id=sub.telegram_id, error=e,
-                                          sending_status=SendingStatus.ERROR)
-            except Exception as err:
-                MailingLog.objects.create(mail=mailing, user_id=sub.telegram_id, error=err,
-                                          sending_status=SendingStatus.ERROR)
-                logger.error(f"Ошибка при отправке рассылки: {err}")
-            else:
-                MailingLog.objects.create(mail=mailing, user_id=sub.telegram_id, sending_status=SendingStatus.SUCCESS)
-                logger.info("Отправка рассылки успешно завершена")
+@celery_app.app.task(bind=True, acks_late=True, reject_on_worker_lost=True, max_retries=None)
+def send_mailing_chunk(self, mailing_id: int, first_pk: int, last_pk: int) -> None:
+    """Задача отправки рассылки пользователям с первичными ключами от first_pk до last_pk.
 
+    Если часть отправляет другой воркер или аренда части потеряна, задача повторяется после
+    истечения аренды: повторно доставленная задача упавшего воркера не должна завершиться,
+    пока часть не отправлена.
+    """
+    mailing = Mailing.objects.get(id=mailing_id)
+    try:
+        MailingBroadcast(mailing).send_range((first_pk, last_pk))
+    except (LeaseHeldError, LeaseLostError) as err:
+        raise self.retry(exc=err, countdown=BroadcastCheckpoint.LEASE_TTL)
 
-@celery_app.app.task
-def send_timed_mailing() -> None:
-    """Задача отправки рассылки со статусом ready_to_send=True и is_instant=True."""
-    now = timezone.now()
-    mailings = Mailing.objects.filter(ready_to_send=True, is_processed=False, is_instant=False, time_start__lte=now)
-    for mailing in mailings:
-        mailing.is_processed = True
-        mailing.save(update_fields=["is_processed"])
-        is_button_used = False
-        data = {}
-        if mailing.button_text and mailing.button_link:
-            is_button_used = True
-        if is_button_used:
-            data = {mailing.button_text: mailing.button_link}
-        keyboard = KeyboardConstructor().create_mixed_keyboard(url_data=data)
-        subs = BotUser.objects.filter(is_active=True)
-        media_files = mailing.media_files.all()
-        for sub in subs:
-            try:
-                if media_files.exists():
-                    if media_files.count() > 1:
-                        media_group = []
-                        for media_instance in media_files:
-                            if media_is_video(media_instance.media.path):
-                                media_group.append(
-                                    InputMediaVideo(
-                                        Path(media_instance.media.path).open(mode='rb'),
-                                        caption=mailing.text
-                                    )
-                                )
-                            else:
-                                media_group.append(
-                                    InputMediaPhoto(
-                                        Path(media_instance.media.path).open(mode='rb'),
-                                        caption=mailing.text
-                                    )
-                                )
-                        bot.send_media_group(
-                            chat_id=sub.telegram_id,
-                            media=media_group
-                        )
-                        bot.send_message(
-                            chat_id=sub.telegram_id,
-                            text=mailing.text,
-                            reply_markup=keyboard
-                        )
-                    else:
-                        media_path = media_files.first().media.path
-                        if media_is_video(media_path):
-                            bot.send_video(
-                                chat_id=sub.telegram_id,
-                                video=Path(media_path).open(mode='rb'),
-                                caption=mailing.text,
-                                reply_markup=keyboard
-                            )
-                        else:
-                            bot.send_photo(
-                                chat_id=sub.telegram_id,
-                                photo=Path(media_path).open(mode='rb'),
-                                caption=mailing.text,
-                                reply_markup=keyboard
-                            )
-                else:
-                    bot.send_message(
-                        chat_id=sub.telegram_id,
-                        text=mailing.text,
-                        reply_markup=keyboard
-                    )
-            except apihelper.ApiTelegramException as e:
-                log_message = except_telegram_exception(e, sub)
-                logger.error(log_message)
-                MailingLog.objects.create(mail=mailing, user_id=sub.telegram_id, error=e,
-                                          sending_status=SendingStatus.ERROR)
-            except Exception as err:
-                MailingLog.objects.create(mail=mailing, user_id=sub.telegram_id, error=err,
-                                          sending_status=SendingStatus.ERROR)
-                logger.error(f"Ошибка при отправке рассылки: {err}")
-            else:
-                MailingLog.objects.create(mail=mailing, user_id=sub.telegram_id, sending_status=SendingStatus.SUCCESS)
-                logger.info("Отправка рассылки успешно завершена")
 
+@celery_app.app.task(acks_late=True, reject_on_worker_lost=True)
+def retry_mailing_recipients(mailing_id: int, telegram_ids: List[int], attempt: int) -> None:
+    """Задача повторной отправки рассылки пользователям после 429 или временной ошибки."""
+    mailing = Mailing.objects.get(id=mailing_id)
+    MailingBroadcast(mailing, attempt=attempt).send_retry(telegram_ids)
 
-@celery_app.app.task
-def broadcast_video_note(file_id, admin_id):
-    users = BotUser.objects.filter(is_active=True)
 
-    sent_count = 0
+@celery_app.app.task(bind=True, acks_late=True, reject_on_worker_lost=True, max_retries=None)
+def plan_mailing_broadcast(self, mailing_id: int) -> None:
+    """Задача разбиения аудитории рассылки на части и параллельной отправки частей подзадачами.
+
+    При повторном запуске продолжает с контрольной точки: заново ставит в очередь
+    незавершённые части и планирует оставшуюся аудиторию после курсора. Если рассылку
+    планирует другой воркер или аренда потеряна, задача повторяется после истечения аренды.
+    """
+    mailing = Mailing.objects.get(id=mailing_id)
+    broadcast = MailingBroadcast(mailing)
 
-    for user in users:
+    lease = broadcast.checkpoint.planner_lease()
+    try:
+        if not lease.acquire():
+            if broadcast.checkpoint.is_planned:
+                logger.info(f"Рассылка {mailing.id} уже запланирована")
+                return
+            raise LeaseHeldError(f"Рассылка {mailing.id} планируется другим воркером")
         try:
-            bot.send_video_note(
-                user.telegram_id,
-                file_id
-            )
-            sent_count += 1
-            time.sleep(0.05)
+            _plan_mailing_broadcast(broadcast, lease)
+        finally:
+            lease.release()
+    except (LeaseHeldError, LeaseLostError) as err:
+        raise self.retry(exc=err, countdown=BroadcastCheckpoint.LEASE_TTL)
 
-        except Exception as err:
-            logger.error(f"Возникла ошибка при отправке кружка: {err}")
 
-    bot.send_message(
-        chat_id=admin_id,
-        text=f"✅ Кружок получили {sent_count} человек"
-    )
+def _plan_mailing_broadcast(broadcast: MailingBroadcast, lease: Lease) -> None:
+    """Планирование рассылки под арендой планировщика."""
+    mailing = broadcast.mailing
+    checkpoint = broadcast.checkpoint
+
+    for chunk in checkpoint.pending_chunks():
+        send_mailing_chunk.delay(mailing.id, *chunk)
+
+    if checkpoint.is_planned:
+        return
+
+    if not checkpoint.cursor:
+        total = Audience().queryset.count()
+        Mailing.objects.filter(pk=mailing.pk).update(recipients_count=total)
+        broadcast.progress.start(total)
+
+    # План отправки собирается здесь один раз, подзадачи частей берут его из кеша
+    plan = broadcast.get_plan()
+    if not all(media_item.file_id for media_item in plan.media):
+        # Сначала отправляем рассылку одному пользователю, чтобы загрузить медиа в Telegram
+        # один раз, остальные части используют сохранённые file_id
+        first = next(Audience(page_size=1).iter_chunks(after_pk=checkpoint.cursor), None)
+        if first:
+            checkpoint.add_chunk(first)
+            broadcast.send_range(first)
+
+    chunks = Audience().iter_chunks(after_pk=checkpoint.cursor)
+
+    count = 0
+    for chunk in chunks:
+        checkpoint.add_chunk(chunk)
+        send_mailing_chunk.delay(mailing.id, *chunk)
+        count += 1
+        lease.renew_if_due()
+    checkpoint.finish_planning()
+    logger.info(f"Рассылка {mailing.id} разбита на {count} частей")
+
+
+def claim_ready_mailings(**filters) -> List[int]:
+    """Захват готовых к отправке, ещё не запущенных рассылок, время начала которых наступило.
+
+    Строки, заблокированные другим воркером, пропускаются (skip_locked), а флаг is_processed
+    ставится условным UPDATE в той же транзакции, поэтому каждую рассылку захватывает
+    только один вызывающий, даже при одновременной сверке и запуске по ETA.
+    """
+    with transaction.atomic():
+        mailing_ids = list(
+            Mailing.objects.select_for_update(skip_locked=True).filter(
+                Q(is_instant=True) | Q(time_start__lte=timezone.now()),
+                ready_to_send=True,
+                is_processed=False,
+                **filters,
+            ).values_list("id", flat=True)
+        )
+        Mailing.objects.filter(pk__in=mailing_ids, is_processed=False).update(is_processed=True)
+    return mailing_ids
+
+
+def start_ready_mailings(**filters) -> None:
+    """Запуск захваченных готовых к отправке рассылок."""
+    for mailing_id in claim_ready_mailings(**filters):
+        plan_mailing_broadcast.delay(mailing_id)
+
+
+def schedule_mailing(mailing: Mailing) -> None:
+    """Постановка готовой рассылки в очередь: моментальной - сразу, запланированной - с ETA на время начала.
+
+    Если время начала изменится, задача с прежним ETA ничего не запустит, рассылку запустит новая задача.
+    """
+    if mailing.is_instant:
+        start_mailing.delay(mailing.id)
+    elif mailing.time_start and mailing.time_start - timezone.now() <= timedelta(seconds=settings.MAILING_ETA_HORIZON):
+        start_mailing.apply_async((mailing.id,), eta=mailing.time_start)
 
 
 @celery_app.app.task
-def broadcast_voice_message(file_id, admin_id):
-    users = BotUser.objects.filter(is_active=True)
+def start_mailing(mailing_id: int) -> None:
+    """Задача запуска рассылки, если она всё ещё готова к отправке и время начала наступило."""
+    start_ready_mailings(pk=mailing_id)
 
-    sent_count = 0
 
-    for user in users:
-        try:
-            bot.send_voice(
-                user.telegram_id,
-                file_id
-            )
-            sent_count += 1
-            time.sleep(0.05)
+@celery_app.app.task
+def reconcile_mailings() -> None:
+    """Задача сверки рассылок на случай потери задач запуска.
 
-        except Exception as err:
-            logger.error(f"Возникла ошибка при отправке кружка: {err}")
+    Запускает рассылки, время начала которых прошло, и ставит в очередь с ETA рассылки,
+    которые начнутся до следующей сверки, но при сохранении были дальше MAILING_ETA_HORIZON.
+    """
+    start_ready_mailings()
 
-    bot.send_message(
-        chat_id=admin_id,
-        text=f"✅ Голосовое сообщение получили {sent_count} человек"
+    now = timezone.now()
+    upcoming = Mailing.objects.filter(
+        Q(time_start__gt=now) & Q(time_start__gt=F("updated_at") + timedelta(seconds=settings.MAILING_ETA_HORIZON)),
+        ready_to_send=True,
+        is_processed=False,
+        is_instant=False,
+        time_start__lte=now + timedelta(seconds=settings.MAILING_RECONCILE_INTERVAL),
     )
+    for mailing in upcoming:
+        start_mailing.apply_async((mailing.id,), eta=mailing.time_start)
+
+
+@celery_app.app.task(bind=True, acks_late=True, reject_on_worker_lost=True, max_retries=None)
+def send_file_chunk(
+        self,
+        broadcast_id: str,
+        message_type: str,
+        file_id: str,
+        admin_id: int,
+        first_pk: int,
+        last_pk: int,
+) -> None:
+    """Задача отправки файла пользователям с первичными ключами от first_pk до last_pk.
+
+    Повторяется после истечения аренды части так же, как send_mailing_chunk.
+    """
+    broadcast = FileBroadcast(broadcast_id, message_type, file_id, admin_id)
+    try:
+        broadcast.send_range((first_pk, last_pk))
+    except (LeaseHeldError, LeaseLostError) as err:
+        raise self.retry(exc=err, countdown=BroadcastCheckpoint.LEASE_TTL)
+    report_file_broadcast(broadcast)
+
+
+@celery_app.app.task(acks_late=True, reject_on_worker_lost=True)
+def retry_file_recipients(
+        broadcast_id: str,
+        message_type: str,
+        file_id: str,
+        admin_id: int,
+        telegram_ids: List[int],
+        attempt: int,
+) -> None:
+    """Задача повторной отправки файла пользователям после 429 или временной ошибки."""
+    broadcast = FileBroadcast(broadcast_id, message_type, file_id, admin_id, attempt=attempt)
+    broadcast.send_retry(telegram_ids)
+    report_file_broadcast(broadcast)
+
+
+def start_file_broadcast(message_type: str, file_id: str, admin_id: int) -> None:
+    """Разбиение аудитории рассылки файла на части и параллельная отправка частей подзадачами."""
+    broadcast = FileBroadcast(uuid4().hex, message_type, file_id, admin_id)
+    checkpoint = broadcast.checkpoint
+    for chunk in Audience().iter_chunks():
+        checkpoint.add_chunk(chunk)
+        send_file_chunk.delay(broadcast.broadcast_id, message_type, file_id, admin_id, *chunk)
+    checkpoint.finish_planning()
+    report_file_broadcast(broadcast)
+
+
+def report_file_broadcast(broadcast: FileBroadcast) -> None:
+    """Отправка отчёта администратору, если все части рассылки файла и повторные попытки отправлены."""
+    if broadcast.checkpoint.claim_report():
+        bot.send_message(
+            chat_id=broadcast.admin_id,
+            text=FILE_BROADCAST_REPORTS[broadcast.message_type].format(
+                sent_count=broadcast.checkpoint.sent_count
+            ),
+        )
+
+
+@celery_app.app.task
+def broadcast_video_note(file_id, admin_id):
+    """Задача рассылки кружка всем активным пользователям."""
+    start_file_broadcast(SendPlan.VIDEO_NOTE, file_id, admin_id)
+
+
+@celery_app.app.task
+def broadcast_voice_message(file_id, admin_id):
+    """Задача рассылки голосового сообщения всем активным пользователям."""
+    start_file_broadcast(SendPlan.VOICE, file_id, admin_id)
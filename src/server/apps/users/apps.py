@@ -5,3 +5,6 @@ class UsersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'server.apps.users'
     verbose_name = "Пользователи"
+
+    def ready(self):
+        from server.apps.users import signals  # noqa: F401
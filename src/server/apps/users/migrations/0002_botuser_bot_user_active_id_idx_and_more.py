@@ -0,0 +1,21 @@
+# Generated by Django 5.2.8 on 2026-10-18 08:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='botuser',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['id'], name='bot_user_active_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='botuser',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['created_at'], name='bot_user_active_created_idx'),
+        ),
+    ]
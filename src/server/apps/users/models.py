@@ -36,3 +36,9 @@ class BotUser(models.Model):
     class Meta:
         verbose_name = "Пользователь бота"
         verbose_name_plural = "Пользователи бота"
+        indexes = [
+            # Постраничный обход активных пользователей по первичному ключу при рассылке
+            models.Index(fields=["id"], condition=models.Q(is_active=True), name="bot_user_active_id_idx"),
+            # Поиск активных пользователей, зарегистрированных до момента запуска сценария
+            models.Index(fields=["created_at"], condition=models.Q(is_active=True), name="bot_user_active_created_idx"),
+        ]
@@ -0,0 +1,73 @@
+from collections import OrderedDict
+import threading
+import time
+from typing import Optional
+
+from django.conf import settings
+
+from server.bot.cache.client import get_redis
+
+
+class KnownUsersCache:
+    """Кеш известных боту пользователей: Telegram ID и сохранённое имя.
+
+    Первый уровень - LRU-кеш в памяти процесса с ограниченным временем жизни записей,
+    второй - хэш в Redis, общий для всех процессов бота. Пользователь считается известным,
+    если он есть в базе с тем же именем, поэтому повторный /start не требует запросов к базе.
+    """
+
+    KEY = "known_users"
+
+    def __init__(
+            self,
+            maxsize: int = settings.KNOWN_USERS_CACHE_SIZE,
+            ttl: int = settings.KNOWN_USERS_CACHE_TTL,
+            client=None,
+    ):
+        """Инициализация параметров."""
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.client = client
+        self._local: "OrderedDict[int, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def is_known(self, telegram_id: int, username: Optional[str]) -> bool:
+        """Пользователь уже сохранён в базе с тем же именем."""
+        username = username or ""
+        with self._lock:
+            cached = self._local.get(telegram_id)
+            if cached and cached[1] > time.monotonic():
+                self._local.move_to_end(telegram_id)
+                return cached[0] == username
+
+        stored = self._client.hget(self.KEY, telegram_id)
+        if stored is None:
+            return False
+        self._remember_locally(telegram_id, stored)
+        return stored == username
+
+    def remember(self, telegram_id: int, username: Optional[str]) -> None:
+        """Запоминание пользователя, сохранённого в базе."""
+        username = username or ""
+        self._client.hset(self.KEY, telegram_id, username)
+        self._remember_locally(telegram_id, username)
+
+    def forget(self, telegram_id: int) -> None:
+        """Удаление пользователя из кеша."""
+        self._client.hdel(self.KEY, telegram_id)
+        with self._lock:
+            self._local.pop(telegram_id, None)
+
+    @property
+    def _client(self):
+        return self.client or get_redis()
+
+    def _remember_locally(self, telegram_id: int, username: str) -> None:
+        with self._lock:
+            self._local[telegram_id] = (username, time.monotonic() + self.ttl)
+            self._local.move_to_end(telegram_id)
+            while len(self._local) > self.maxsize:
+                self._local.popitem(last=False)
+
+
+known_users = KnownUsersCache()
@@ -0,0 +1,166 @@
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+import uuid
+
+from django.conf import settings
+from django.db import close_old_connections
+from loguru import logger
+
+from server.apps.users.models import BotUser
+from server.apps.users.services.known_users import known_users
+from server.bot.cache.client import get_redis
+
+
+# Перенос пачки из очереди в отдельный список обрабатываемых одной операцией
+CLAIM_SCRIPT = """
+local values = redis.call('LRANGE', KEYS[1], 0, tonumber(ARGV[1]) - 1)
+if #values == 0 then
+    return values
+end
+redis.call('RPUSH', KEYS[3], unpack(values))
+redis.call('LTRIM', KEYS[1], #values, -1)
+redis.call('ZADD', KEYS[2], ARGV[2], KEYS[3])
+return values
+"""
+
+# Возврат пачки в очередь; повторный вызов для той же пачки ничего не делает
+REQUEUE_SCRIPT = """
+local values = redis.call('LRANGE', KEYS[3], 0, -1)
+if #values > 0 then
+    redis.call('RPUSH', KEYS[1], unpack(values))
+end
+redis.call('DEL', KEYS[3])
+redis.call('ZREM', KEYS[2], KEYS[3])
+return #values
+"""
+
+
+class RegistrationQueue:
+    """Очередь регистраций пользователей бота в Redis.
+
+    Хэндлер /start только ставит пользователя в очередь и сразу отвечает. Фоновый поток
+    каждого процесса бота раз в interval секунд забирает из очереди до batch_size записей
+    и сохраняет их одним запросом INSERT ... ON CONFLICT, поэтому при наплыве новых
+    пользователей число транзакций и соединений с базой не растёт вместе с нагрузкой.
+
+    Пачка удаляется из Redis только после сохранения: до этого она лежит в отдельном
+    списке, и если процесс упал, не дождавшись сохранения, через timeout секунд пачка
+    возвращается в очередь. Сохранение идемпотентно, поэтому повтор пачки безопасен.
+    """
+
+    KEY = "bot_user_registrations"
+    BATCHES_KEY = "bot_user_registrations:batches"
+
+    def __init__(
+            self,
+            interval: float = settings.REGISTRATION_FLUSH_INTERVAL,
+            batch_size: int = settings.REGISTRATION_BATCH_SIZE,
+            timeout: int = settings.REGISTRATION_BATCH_TIMEOUT,
+            client=None,
+    ):
+        """Инициализация параметров."""
+        self.interval = interval
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self.client = client
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def put(self, telegram_id: int, username: Optional[str]) -> None:
+        """Постановка пользователя в очередь на сохранение."""
+        self._client.rpush(self.KEY, json.dumps({"telegram_id": telegram_id, "username": username}))
+        self._ensure_flusher()
+
+    def flush(self) -> int:
+        """Сохранение очередной пачки пользователей из очереди. Возвращает число записей в пачке."""
+        batch_key = f"{self.KEY}:batch:{uuid.uuid4().hex}"
+        values: List[str] = self._client.eval(
+            CLAIM_SCRIPT, 3, self.KEY, self.BATCHES_KEY, batch_key, self.batch_size, time.time(),
+        )
+        if not values:
+            return 0
+
+        # Повторный /start до сохранения ставит пользователя в очередь ещё раз - оставляем последнее имя
+        users: Dict[int, Optional[str]] = {}
+        for value in values:
+            data = json.loads(value)
+            users[data["telegram_id"]] = data["username"]
+
+        try:
+            self._save(users)
+        except Exception:
+            # Возвращаем пачку в очередь, чтобы сохранить её при следующей попытке
+            self._requeue(batch_key)
+            raise
+        pipeline = self._client.pipeline(transaction=True)
+        pipeline.delete(batch_key)
+        pipeline.zrem(self.BATCHES_KEY, batch_key)
+        pipeline.execute()
+        for telegram_id, username in users.items():
+            known_users.remember(telegram_id, username)
+        return len(values)
+
+    def recover(self) -> int:
+        """Возврат в очередь пачек, не сохранённых за timeout секунд. Возвращает число пачек."""
+        stale = self._client.zrangebyscore(self.BATCHES_KEY, "-inf", time.time() - self.timeout)
+        for batch_key in stale:
+            self._requeue(batch_key)
+        if stale:
+            logger.warning(f"Возвращено в очередь незавершённых пачек регистраций: {len(stale)}")
+        return len(stale)
+
+    def _requeue(self, batch_key: str) -> None:
+        self._client.eval(REQUEUE_SCRIPT, 3, self.KEY, self.BATCHES_KEY, batch_key)
+
+    @staticmethod
+    def _save(users: Dict[int, Optional[str]]) -> None:
+        close_old_connections()
+        try:
+            BotUser.objects.bulk_create(
+                [BotUser(telegram_id=telegram_id, username=username) for telegram_id, username in users.items()],
+                update_conflicts=True,
+                unique_fields=["telegram_id"],
+                update_fields=["username"],
+            )
+        finally:
+            close_old_connections()
+
+    @property
+    def _client(self):
+        return self.client or get_redis()
+
+    def _ensure_flusher(self) -> None:
+        """Запуск фонового потока сохранения при первой регистрации в процессе."""
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                threading.Thread(target=self._run, name="bot-user-registrations", daemon=True).start()
+                self._pid = os.getpid()
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.recover()
+                # Забираем пачки, пока очередь не опустеет
+                while self.flush() == self.batch_size:
+                    pass
+            except Exception as exc:
+                logger.error(f"Ошибка сохранения пользователей бота: {exc}")
+
+
+registration_queue = RegistrationQueue()
+
+
+def save_bot_user(telegram_id: int, username: Optional[str]) -> None:
+    """Сохранение пользователя бота без записи в базу, если он уже известен с тем же именем.
+
+    Новые пользователи и смена имени сохраняются пачками через очередь регистраций.
+    """
+    if known_users.is_known(telegram_id, username):
+        return
+    registration_queue.put(telegram_id, username)
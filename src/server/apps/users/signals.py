@@ -0,0 +1,11 @@
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from server.apps.users.models import BotUser
+from server.apps.users.services.known_users import known_users
+
+
+@receiver(post_delete, sender=BotUser)
+def forget_deleted_bot_user(sender, instance: BotUser, **kwargs):
+    """Удалённый пользователь снова сохраняется в базе при следующем /start."""
+    known_users.forget(instance.telegram_id)
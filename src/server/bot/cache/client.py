@@ -0,0 +1,80 @@
+import os
+import sys
+import threading
+from typing import Optional
+
+from django.conf import settings
+import redis
+from redis import asyncio as async_redis
+
+
+_pool: Optional[redis.BlockingConnectionPool] = None
+_client: Optional[redis.Redis] = None
+_lock = threading.Lock()
+
+
+def get_process_role() -> str:
+    """Роль процесса (web, bot, celery-bulk, ...) для имени клиента Redis.
+
+    Задаётся переменной PROCESS_ROLE; если она не задана, берётся имя команды manage.py
+    или имя запущенной программы.
+    """
+    if settings.PROCESS_ROLE:
+        return settings.PROCESS_ROLE
+    program = os.path.basename(sys.argv[0]) if sys.argv else ""
+    if program == "manage.py" and len(sys.argv) > 1:
+        return sys.argv[1]
+    return program or "python"
+
+
+def get_client_name() -> str:
+    """Имя клиента Redis вида <приложение>:<роль>:<pid>, по которому redis_stats группирует соединения.
+
+    Вызывается при создании пула, то есть уже в дочернем процессе после fork.
+    """
+    return f"{settings.REDIS_CLIENT_NAME}:{get_process_role()}:{os.getpid()}"
+
+
+def get_connection_kwargs() -> dict:
+    """Параметры соединений с Redis, общие для синхронных и асинхронных клиентов."""
+    return {
+        "host": settings.REDIS_HOST,
+        "port": settings.REDIS_PORT,
+        "db": settings.REDIS_DB,
+        "encoding": "utf-8",
+        "decode_responses": True,
+        "socket_timeout": settings.REDIS_SOCKET_TIMEOUT,
+        "socket_connect_timeout": settings.REDIS_SOCKET_CONNECT_TIMEOUT,
+        "health_check_interval": settings.REDIS_HEALTH_CHECK_INTERVAL,
+        "retry_on_timeout": True,
+        "client_name": get_client_name(),
+    }
+
+
+def get_redis() -> redis.Redis:
+    """Общий клиент Redis процесса.
+
+    Клиент использует ограниченный пул соединений: при исчерпании пула поток ждёт
+    освобождения соединения до REDIS_POOL_TIMEOUT секунд, а не открывает новое.
+    После fork (prefork-воркеры Celery, воркеры gunicorn) пул пересоздаётся
+    в дочернем процессе, и соединения родителя не используются.
+    """
+    global _pool, _client
+    if _client is None or _pool.pid != os.getpid():
+        with _lock:
+            if _client is None or _pool.pid != os.getpid():
+                _pool = redis.BlockingConnectionPool(
+                    max_connections=settings.REDIS_MAX_CONNECTIONS,
+                    timeout=settings.REDIS_POOL_TIMEOUT,
+                    **get_connection_kwargs(),
+                )
+                _client = redis.Redis(connection_pool=_pool)
+    return _client
+
+
+def get_async_redis() -> async_redis.Redis:
+    """Новый асинхронный клиент Redis. Должен создаваться в том цикле событий, где используется."""
+    return async_redis.Redis(
+        max_connections=settings.REDIS_MAX_CONNECTIONS,
+        **get_connection_kwargs(),
+    )
@@ -0,0 +1,75 @@
+import json
+from typing import Callable, Dict, List, Optional
+
+from django.conf import settings
+from telebot import Handler, TeleBot
+from telebot.handler_backends import HandlerBackend
+
+from server.bot.cache.client import get_redis
+
+
+class RedisNextStepBackend(HandlerBackend):
+    """Хранилище next-step хэндлеров в Redis, общее для всех процессов бота.
+
+    Хэндлер сохраняется по имени из реестра вместе с аргументами в JSON, поэтому
+    диалог продолжается в любом процессе и переживает перезапуск бота. Объект бота
+    не сериализуется и передаётся хэндлеру первым аргументом при получении.
+    Незавершённые диалоги удаляются по истечении TTL.
+    """
+
+    KEY = "next_step:{chat_id}"
+
+    def __init__(
+            self,
+            handlers_map: Dict[str, Callable],
+            ttl: int = settings.NEXT_STEP_HANDLER_TTL,
+            client=None,
+    ):
+        """Инициализация параметров."""
+        super().__init__()
+        self.handlers_map = handlers_map
+        self.names = {callback: name for name, callback in handlers_map.items()}
+        self.ttl = ttl
+        self.client = client or get_redis()
+        self.bot: Optional[TeleBot] = None
+
+    def register_handler(self, handler_group_id: int, handler: Handler) -> None:
+        """Добавление хэндлера чата."""
+        if handler.callback not in self.names:
+            raise ValueError("Next-step хэндлер отсутствует в реестре RedisNextStepBackend")
+        value = json.dumps({
+            "callback": self.names[handler.callback],
+            "args": handler.args,
+            "kwargs": handler.kwargs,
+        })
+        key = self._key(handler_group_id)
+        pipeline = self.client.pipeline()
+        pipeline.rpush(key, value)
+        pipeline.expire(key, self.ttl)
+        pipeline.execute()
+
+    def clear_handlers(self, handler_group_id: int) -> None:
+        """Удаление хэндлеров чата."""
+        self.client.delete(self._key(handler_group_id))
+
+    def get_handlers(self, handler_group_id: int) -> Optional[List[Handler]]:
+        """Получение и удаление хэндлеров чата за один запрос к Redis."""
+        key = self._key(handler_group_id)
+        pipeline = self.client.pipeline(transaction=True)
+        pipeline.lrange(key, 0, -1)
+        pipeline.delete(key)
+        values, _ = pipeline.execute()
+        if not values:
+            return None
+
+        handlers = []
+        for value in values:
+            data = json.loads(value)
+            callback = self.handlers_map.get(data["callback"])
+            if callback is None:
+                continue
+            handlers.append(Handler(callback, self.bot, *data["args"], **data["kwargs"]))
+        return handlers
+
+    def _key(self, handler_group_id: int) -> str:
+        return self.KEY.format(chat_id=handler_group_id)
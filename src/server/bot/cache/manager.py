@@ -12,14 +12,7 @@ class RedisCacheManager:
     def set(cls, key: int, **kwargs) -> None:
         """Добавление записи в кеш."""
         key = str(key)
-        data = cls.store.get(key=key)
-
-        if data is None:
-            return cls.store.add(key=key, data=kwargs)
-
-        data.update(**kwargs)
-
-        return cls.store.add(key=key, data=data)
+        return cls.store.update(key=key, data=kwargs)
 
     @classmethod
     def get(cls, key: int) -> Dict[str, str]:
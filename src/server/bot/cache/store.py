@@ -1,39 +1,56 @@
 import json
-from typing import Dict
+from typing import Any, Dict, Optional
 
-from django.conf import settings
-import redis
+from server.bot.cache.client import get_redis
 
 
-redis = redis.Redis(
-    host=settings.REDIS_HOST,
-    port=settings.REDIS_PORT,
-    encoding='utf-8',
-    decode_responses=True,
-)
+class RedisStorage:
+    """Класс хранилища кэша в Redis.
 
+    Запись хранится в хэше: каждое поле сериализуется в JSON отдельно, поэтому
+    частичное обновление записи не перезаписывает поля, изменённые параллельно.
+    """
 
-class RedisStorage:
-    """Класс хранилища кэша в Redis."""
+    prefix = "cache"
+
+    @classmethod
+    def add(cls, key: str, data: Dict[str, Any], ttl: Optional[int] = None) -> None:
+        """Метод добавления записи в кеш с заменой предыдущего значения."""
+        name = cls._name(key)
+        pipeline = get_redis().pipeline()
+        pipeline.delete(name)
+        cls._write(pipeline, name, data, ttl)
+        pipeline.execute()
 
     @classmethod
-    def add(cls, key: str, data: Dict[str, str]) -> None:
-        """Метод добавления записи в кеш."""
-        redis.set(
-            name=key,
-            value=json.dumps(data),
-        )
+    def update(cls, key: str, data: Dict[str, Any], ttl: Optional[int] = None) -> None:
+        """Метод обновления полей записи в кеше."""
+        name = cls._name(key)
+        pipeline = get_redis().pipeline()
+        cls._write(pipeline, name, data, ttl)
+        pipeline.execute()
 
     @classmethod
-    def get(cls, key: str) -> Dict[str, str]:
+    def get(cls, key: str) -> Dict[str, Any]:
         """Метод получения записи из кэша."""
-        result = redis.get(key)
-        return json.loads(result) if result else {}
+        result = get_redis().hgetall(cls._name(key))
+        return {field: json.loads(value) for field, value in result.items()}
 
     @classmethod
     def delete(cls, key: str) -> None:
         """Метод удаления записи из кеша."""
-        redis.delete(key)
+        get_redis().delete(cls._name(key))
+
+    @classmethod
+    def _name(cls, key: str) -> str:
+        return f"{cls.prefix}:{key}"
+
+    @staticmethod
+    def _write(pipeline, name: str, data: Dict[str, Any], ttl: Optional[int]) -> None:
+        if data:
+            pipeline.hset(name, mapping={field: json.dumps(value) for field, value in data.items()})
+        if ttl:
+            pipeline.expire(name, ttl)
 
 
 cache_store = RedisStorage()
@@ -0,0 +1,181 @@
+import threading
+from typing import Callable
+
+from django.conf import settings
+from django.db import close_old_connections
+from loguru import logger
+from redis.exceptions import ResponseError
+from telebot.types import Update
+
+from server.apps.periodic_tasks.services.lease import Lease, LeaseLostError
+from server.bot.cache.client import get_redis
+
+
+# Типы обновлений, содержащие чат, в порядке проверки
+CHAT_UPDATE_FIELDS = (
+    "message",
+    "edited_message",
+    "channel_post",
+    "edited_channel_post",
+    "business_message",
+    "edited_business_message",
+    "my_chat_member",
+    "chat_member",
+    "chat_join_request",
+    "message_reaction",
+    "chat_boost",
+)
+
+# Типы обновлений, содержащие только отправителя
+USER_UPDATE_FIELDS = (
+    "callback_query",
+    "inline_query",
+    "chosen_inline_result",
+    "shipping_query",
+    "pre_checkout_query",
+    "poll_answer",
+)
+
+
+def get_update_chat_id(update: Update) -> int:
+    """Идентификатор чата (или пользователя), к которому относится обновление."""
+    for field in CHAT_UPDATE_FIELDS:
+        content = getattr(update, field, None)
+        if content is not None:
+            return content.chat.id
+    for field in USER_UPDATE_FIELDS:
+        content = getattr(update, field, None)
+        if content is not None:
+            return content.from_user.id if field != "poll_answer" else content.user.id
+    return 0
+
+
+class UpdateStreams:
+    """Очередь обновлений бота в потоках Redis (streams), разделённая на партиции по чату.
+
+    Вебхук только добавляет обновление в поток партиции его чата и отвечает Telegram,
+    поэтому принимать обновления может любой процесс gunicorn. Каждую партицию читает
+    один поток обработчика (команда run_update_workers): обновления разных чатов
+    обрабатываются параллельно, обновления одного чата - строго по очереди, на что
+    полагаются next-step хэндлеры. Обновление подтверждается только после обработки,
+    поэтому после перезапуска обработчика необработанные обновления читаются заново.
+
+    Обработчиков может быть запущено несколько: партицию читает только владелец её аренды
+    в Redis, остальные ждут и подхватывают партицию, если владелец упал. Ошибки Redis
+    не останавливают поток партиции: чтение повторяется с нарастающей паузой.
+    """
+
+    KEY = "bot:updates:{partition}"
+    GROUP = "bot"
+    BATCH_SIZE = 10
+    # Меньше таймаута сокета клиента Redis, иначе блокирующее чтение прервётся по таймауту
+    BLOCK_MS = 2000
+    # Срок аренды партиции и период попыток захватить чужую партицию, секунд
+    LEASE_TTL = 60
+    OWNER_POLL_INTERVAL = 5
+    # Наибольшая пауза перед повтором после ошибки Redis, секунд
+    MAX_BACKOFF = 30
+
+    def __init__(
+            self,
+            partitions: int = settings.BOT_UPDATE_WORKERS,
+            max_length: int = settings.BOT_UPDATE_QUEUE_SIZE,
+            client=None,
+    ):
+        """Инициализация параметров."""
+        self.partitions = partitions
+        self.max_length = max_length
+        self.client = client
+
+    def publish(self, update: Update, data: str) -> None:
+        """Добавление обновления (data - исходный JSON) в поток партиции его чата."""
+        key = self._key(get_update_chat_id(update) % self.partitions)
+        self._client.xadd(key, {"update": data}, maxlen=self.max_length, approximate=True)
+
+    def consume(self, partition: int, handle: Callable[[Update], None], stop: threading.Event) -> None:
+        """Последовательная обработка обновлений партиции до установки stop.
+
+        Поток ждёт аренды партиции и обрабатывает её обновления, пока владеет арендой.
+        """
+        backoff = 0
+        while not stop.is_set():
+            lease = Lease(f"{self._key(partition)}:owner", self.LEASE_TTL, self._client)
+            try:
+                if not lease.acquire():
+                    stop.wait(self.OWNER_POLL_INTERVAL)
+                    continue
+                logger.info(f"Партиция обновлений {partition} захвачена обработчиком")
+                try:
+                    self._consume_owned(partition, handle, stop, lease)
+                finally:
+                    lease.release()
+            except LeaseLostError:
+                logger.warning(f"Аренда партиции обновлений {partition} истекла, партиция передана")
+            except Exception as exc:
+                backoff = min(max(backoff * 2, 1), self.MAX_BACKOFF)
+                logger.exception(f"Ошибка чтения партиции обновлений {partition}, повтор через {backoff} с: {exc}")
+                stop.wait(backoff)
+            else:
+                backoff = 0
+
+    def _consume_owned(
+            self,
+            partition: int,
+            handle: Callable[[Update], None],
+            stop: threading.Event,
+            lease: Lease,
+    ) -> None:
+        """Обработка обновлений партиции под арендой.
+
+        Сначала дочитываются обновления, полученные, но не подтверждённые прежним владельцем.
+        """
+        key = self._key(partition)
+        consumer = f"partition-{partition}"
+        self._create_group(key)
+        last_id = "0"
+        while not stop.is_set():
+            lease.renew_if_due()
+            response = self._client.xreadgroup(
+                self.GROUP,
+                consumer,
+                {key: last_id},
+                count=self.BATCH_SIZE,
+                block=self.BLOCK_MS if last_id == ">" else None,
+            )
+            entries = response[0][1] if response else []
+            if last_id == "0" and not entries:
+                last_id = ">"
+                continue
+            for entry_id, fields in entries:
+                lease.renew_if_due()
+                # Запись могла быть удалена обрезкой потока, пока ожидала подтверждения
+                if fields:
+                    self._handle(handle, fields["update"])
+                self._client.xack(key, self.GROUP, entry_id)
+
+    @staticmethod
+    def _handle(handle: Callable[[Update], None], data: str) -> None:
+        close_old_connections()
+        try:
+            handle(Update.de_json(data))
+        except Exception as exc:
+            logger.exception(f"Ошибка обработки обновления: {exc}")
+        finally:
+            close_old_connections()
+
+    def _create_group(self, key: str) -> None:
+        try:
+            self._client.xgroup_create(key, self.GROUP, id="0", mkstream=True)
+        except ResponseError as exc:
+            if "BUSYGROUP" not in str(exc):
+                raise
+
+    @property
+    def _client(self):
+        return self.client or get_redis()
+
+    def _key(self, partition: int) -> str:
+        return self.KEY.format(partition=partition)
+
+
+update_streams = UpdateStreams()
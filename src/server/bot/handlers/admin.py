@@ -5,6 +5,7 @@ from telebot.types import CallbackQuery, Message
 from server.bot.cache.manager import RedisCacheManager
 from server.bot.handlers.helpers import get_admin_menu_data
 from server.bot.utils import messages
+from server.bot.utils.callbacks import Callback
 from server.bot.utils.error_handler import ErrorHandler
 from server.bot.utils.keyboards import KeyboardConstructor
 
@@ -51,50 +52,54 @@ def admin(message: Message, bot: TeleBot):
     )
 
 
-@ErrorHandler.create()
-def start_fast_mailing(callback: CallbackQuery, bot: TeleBot):
+def request_broadcast_file(callback: CallbackQuery, bot: TeleBot, text: str, next_step_handler) -> None:
+    """Запрос у администратора файла для рассылки."""
     telegram_id = callback.message.chat.id
     bot.send_message(
         chat_id=telegram_id,
-        text=messages.SEND_VIDEO_NOTE
+        text=text
     )
-    bot.register_next_step_handler_by_chat_id(telegram_id, handle_video_note, bot)
-
-
-@ErrorHandler.create()
-def handle_video_note(message: Message, bot: TeleBot):
+    bot.register_next_step_handler_by_chat_id(telegram_id, next_step_handler)
+
+
+def accept_broadcast_file(
+        message: Message,
+        bot: TeleBot,
+        file,
+        wrong_file_text: str,
+        question_text: str,
+        broadcast_callback: str,
+        next_step_handler,
+) -> None:
+    """Сохранение присланного администратором файла и запрос подтверждения рассылки."""
     telegram_id = message.chat.id
-    if message.text == "/admin":
-        pass
 
-    if not message.video_note:
+    if not file:
         bot.send_message(
             chat_id=telegram_id,
-            text=messages.SENT_NOT_VIDEO_NOTE
+            text=wrong_file_text
         )
-        bot.register_next_step_handler_by_chat_id(telegram_id, handle_video_note, bot)
+        bot.register_next_step_handler_by_chat_id(telegram_id, next_step_handler)
         return
 
-    file_id = message.video_note.file_id
-    RedisCacheManager.set(key=telegram_id, file_id=file_id)
+    RedisCacheManager.set(key=telegram_id, file_id=file.file_id)
 
     keyboard = KeyboardConstructor(one_time_keyboard=True).create_inline_keyboard(
         {
-            "✉️ Отправить": "broadcast",
+            "✉️ Отправить": broadcast_callback,
             "❌ Отменить": "admin"
         }
     )
 
     bot.send_message(
         chat_id=telegram_id,
-        text=messages.AFTER_VIDEO_NOTE_QUESTION,
+        text=question_text,
         reply_markup=keyboard,
     )
 
 
-@ErrorHandler.create()
-def broadcast_video_note_callback(callback: CallbackQuery, bot: TeleBot):
-    from server.apps.periodic_tasks.tasks import broadcast_video_note
+def start_file_broadcast(callback: CallbackQuery, bot: TeleBot, task, started_text: str) -> None:
+    """Запуск рассылки сохранённого файла."""
     bot.edit_message_reply_markup(
         callback.message.chat.id,
         message_id=callback.message.message_id,
@@ -104,80 +109,63 @@ def broadcast_video_note_callback(callback: CallbackQuery, bot: TeleBot):
     cache = RedisCacheManager.get(key=telegram_id)
     file_id = cache.get("file_id", None)
     if not file_id:
-        return bot.send_message(
+        bot.send_message(
             chat_id=telegram_id,
             text=messages.NO_FILE_ID
         )
+        return
 
-    broadcast_video_note.delay(file_id, telegram_id)
+    task.delay(file_id, telegram_id)
 
     bot.send_message(
         chat_id=telegram_id,
-        text=messages.VIDEO_NOTE_BROADCAST_START
+        text=started_text
     )
 
 
 @ErrorHandler.create()
-def start_voice_message_mailing(callback: CallbackQuery, bot: TeleBot):
-    telegram_id = callback.message.chat.id
-    bot.send_message(
-        chat_id=telegram_id,
-        text=messages.SEND_VOICE_MESSAGE
+def start_fast_mailing(callback: CallbackQuery, bot: TeleBot):
+    request_broadcast_file(callback, bot, messages.SEND_VIDEO_NOTE, handle_video_note)
+
+
+@ErrorHandler.create()
+def handle_video_note(message: Message, bot: TeleBot):
+    accept_broadcast_file(
+        message,
+        bot,
+        file=message.video_note,
+        wrong_file_text=messages.SENT_NOT_VIDEO_NOTE,
+        question_text=messages.AFTER_VIDEO_NOTE_QUESTION,
+        broadcast_callback=Callback.BROADCAST.value,
+        next_step_handler=handle_video_note,
     )
-    bot.register_next_step_handler_by_chat_id(telegram_id, handle_voice_message, bot)
 
 
 @ErrorHandler.create()
-def handle_voice_message(message: Message, bot: TeleBot):
-    telegram_id = message.chat.id
-    if message.text == "/admin":
-        pass
+def broadcast_video_note_callback(callback: CallbackQuery, bot: TeleBot):
+    from server.apps.periodic_tasks.tasks import broadcast_video_note
+    start_file_broadcast(callback, bot, broadcast_video_note, messages.VIDEO_NOTE_BROADCAST_START)
 
-    if not message.voice:
-        bot.send_message(
-            chat_id=telegram_id,
-            text=messages.SENT_NOT_VOICE_MESSAGE
-        )
-        bot.register_next_step_handler_by_chat_id(telegram_id, handle_voice_message, bot)
-        return
 
-    file_id = message.voice.file_id
-    RedisCacheManager.set(key=telegram_id, file_id=file_id)
+@ErrorHandler.create()
+def start_voice_message_mailing(callback: CallbackQuery, bot: TeleBot):
+    request_broadcast_file(callback, bot, messages.SEND_VOICE_MESSAGE, handle_voice_message)
 
-    keyboard = KeyboardConstructor(one_time_keyboard=True).create_inline_keyboard(
-        {
-            "✉️ Отправить": "broadcast_voice",
-            "❌ Отменить": "admin"
-        }
-    )
 
-    bot.send_message(
-        chat_id=telegram_id,
-        text=messages.AFTER_VOICE_MESSAGE_QUESTION,
-        reply_markup=keyboard,
+@ErrorHandler.create()
+def handle_voice_message(message: Message, bot: TeleBot):
+    accept_broadcast_file(
+        message,
+        bot,
+        file=message.voice,
+        wrong_file_text=messages.SENT_NOT_VOICE_MESSAGE,
+        question_text=messages.AFTER_VOICE_MESSAGE_QUESTION,
+        broadcast_callback=Callback.BROADCAST_VOICE.value,
+        next_step_handler=handle_voice_message,
     )
 
 
 @ErrorHandler.create()
 def broadcast_voice_message_callback(callback: CallbackQuery, bot: TeleBot):
     from server.apps.periodic_tasks.tasks import broadcast_voice_message
-    bot.edit_message_reply_markup(
-        callback.message.chat.id,
-        message_id=callback.message.message_id,
-        reply_markup=None,
-    )
-    telegram_id = callback.message.chat.id
-    cache = RedisCacheManager.get(key=telegram_id)
-    file_id = cache.get("file_id", None)
-    if not file_id:
-        return bot.send_message(
-            chat_id=telegram_id,
-            text=messages.NO_FILE_ID
-        )
-
-    broadcast_voice_message.delay(file_id, telegram_id)
-
-    bot.send_message(
-        chat_id=telegram_id,
-        text=messages.VOICE_MESSAGE_BROADCAST_START
-    )
+    start_file_broadcast(callback, bot, broadcast_voice_message, messages.VOICE_MESSAGE_BROADCAST_START)
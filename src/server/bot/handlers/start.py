@@ -1,7 +1,7 @@
 from telebot import TeleBot
 from telebot.types import CallbackQuery, Message
 
-from server.apps.users.models import BotUser
+from server.apps.users.services.registration import save_bot_user
 from server.bot.cache.manager import RedisCacheManager
 from server.bot.handlers.helpers import get_start_data
 from server.bot.utils import messages
@@ -15,7 +15,7 @@ def start(message: Message, bot: TeleBot):
     telegram_id = message.chat.id
     RedisCacheManager.delete(key=telegram_id)
     username = message.from_user.first_name if message.from_user.first_name else message.from_user.username
-    user, _ = BotUser.objects.update_or_create(telegram_id=telegram_id, defaults={'username': username})
+    save_bot_user(telegram_id, username)
     data = get_start_data()
     keyboard = KeyboardConstructor().create_inline_keyboard(data)
     return bot.send_message(
@@ -3,10 +3,13 @@ import logging
 from django.conf import settings
 from telebot import TeleBot, logger
 
+from server.bot.cache.handlers import RedisNextStepBackend
 from server.bot.handlers.admin import (
     admin,
     admin_with_callback,
     broadcast_video_note_callback,
+    handle_video_note,
+    handle_voice_message,
     start_fast_mailing,
     start_voice_message_mailing,
     broadcast_voice_message_callback,
@@ -18,10 +21,23 @@ from server.bot.utils.callbacks import Callback
 logger = logger
 logger.setLevel(logging.DEBUG)
 
+# Реестр next-step хэндлеров: в Redis хэндлер сохраняется по имени
+NEXT_STEP_HANDLERS_MAP = {
+    'handle_video_note': handle_video_note,
+    'handle_voice_message': handle_voice_message,
+}
+
+next_step_backend = RedisNextStepBackend(NEXT_STEP_HANDLERS_MAP)
+
+# Обновления обрабатываются в потоке вызова: порядок внутри чата обеспечивает очередь
+# обновлений (server.bot.dispatcher), а не пул потоков TeleBot
 bot = TeleBot(
     settings.BOT_TOKEN,
     parse_mode='HTML',
+    threaded=False,
+    next_step_backend=next_step_backend,
 )
+next_step_backend.bot = bot
 
 MESSAGE_HANDLERS_MAP = {
     start: {
@@ -0,0 +1,49 @@
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.core.management import BaseCommand
+
+from server.bot.cache.client import get_redis
+
+
+class Command(BaseCommand):
+    """Команда для вывода статистики соединений с Redis."""
+
+    help = 'Статистика соединений с Redis для подбора размера пулов'
+
+    def handle(self, *args, **options):
+        client = get_redis()
+        clients = client.client_list()
+        info = client.info("clients")
+
+        self.stdout.write(f"Подключено клиентов: {info['connected_clients']}")
+        self.stdout.write(f"Заблокировано клиентов: {info['blocked_clients']}")
+        self.stdout.write(f"Лимит сервера: {client.config_get('maxclients').get('maxclients')}")
+        self.stdout.write(f"Размер пула на процесс: {settings.REDIS_MAX_CONNECTIONS}")
+
+        # Имя клиента: <приложение>:<роль>:<pid>, соединения брокера Celery и чужие клиенты без имени
+        per_process = defaultdict(Counter)
+        active = Counter()
+        other = Counter()
+        for item in clients:
+            app, _, rest = (item.get("name") or "").partition(":")
+            role, _, pid = rest.rpartition(":")
+            if app != settings.REDIS_CLIENT_NAME or not role:
+                other[item.get("name") or "-"] += 1
+                continue
+            per_process[role][pid] += 1
+            # Соединение, простаивающее в пуле, имеет idle > 0; заблокированное (XREAD BLOCK) тоже занято
+            if int(item.get("idle", 0)) == 0 or "b" in item.get("flags", ""):
+                active[role] += 1
+
+        self.stdout.write("Соединения по ролям (процессов / соединений / максимум на процесс / активны):")
+        for role, processes in sorted(per_process.items()):
+            busiest = max(processes.values())
+            warning = " — пул исчерпан" if busiest >= settings.REDIS_MAX_CONNECTIONS else ""
+            self.stdout.write(
+                f"  {role}: {len(processes)} / {sum(processes.values())} / {busiest} / {active[role]}{warning}"
+            )
+        if other:
+            self.stdout.write("Прочие соединения (брокер Celery, внешние клиенты):")
+            for name, count in other.most_common():
+                self.stdout.write(f"  {name}: {count}")
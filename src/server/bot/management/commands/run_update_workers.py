@@ -0,0 +1,41 @@
+import signal
+import threading
+
+from django.core.management import BaseCommand
+from loguru import logger
+
+from server.bot.dispatcher import update_streams
+from server.bot.main import bot
+
+
+class Command(BaseCommand):
+    """Команда для запуска обработки обновлений бота, принятых вебхуком."""
+
+    help = 'Обработка обновлений бота из очереди в Redis. Партиции делятся между запущенными экземплярами'
+
+    def handle(self, *args, **options):
+        stop = threading.Event()
+        signal.signal(signal.SIGTERM, lambda *_: stop.set())
+
+        threads = [
+            threading.Thread(
+                target=update_streams.consume,
+                args=(partition, self.process_update, stop),
+                name=f"bot-updates-{partition}",
+            )
+            for partition in range(update_streams.partitions)
+        ]
+        for thread in threads:
+            thread.start()
+        logger.info(f'Обработка обновлений бота запущена, партиций: {len(threads)}')
+
+        try:
+            for thread in threads:
+                thread.join()
+        except KeyboardInterrupt:
+            stop.set()
+        logger.info('Обработка обновлений бота остановлена')
+
+    @staticmethod
+    def process_update(update) -> None:
+        bot.process_new_updates([update])
@@ -1,6 +1,7 @@
+from http import HTTPStatus
+
 from loguru import logger
 import requests
-from rest_framework import status
 
 from server import settings
 
@@ -14,12 +15,17 @@ class TelegramBotWebhook:
 
     @property
     def set_webhook_url(self):
-        return 'https://api.telegram.org/bot{token}/setWebHook?url={domain}/{url}/'.format(
+        return 'https://api.telegram.org/bot{token}/setWebHook'.format(
             token=self.token,
-            domain=settings.APP_URL,
-            url=self.url,
         )
 
+    @property
+    def set_webhook_params(self):
+        return {
+            'url': '{domain}/{url}/'.format(domain=settings.APP_URL, url=self.url),
+            'secret_token': settings.WEBHOOK_SECRET,
+        }
+
     @property
     def delete_webhook_url(self):
         return 'https://api.telegram.org/bot{token}/deleteWebHook'.format(
@@ -31,7 +37,7 @@ class TelegramBotWebhook:
             response = requests.get(self.delete_webhook_url)
             status_code = response.status_code
 
-            if status_code != status.HTTP_200_OK:
+            if status_code != HTTPStatus.OK:
                 logger.error(
                     'Ошибка удаления вебхука для бота: {exc}\n{trace}'.format(
                         exc=status_code,
@@ -40,10 +46,10 @@ class TelegramBotWebhook:
                 )
                 raise Exception
 
-            response = requests.get(self.set_webhook_url)
+            response = requests.get(self.set_webhook_url, params=self.set_webhook_params)
             status_code = response.status_code
 
-            if status_code != status.HTTP_200_OK:
+            if status_code != HTTPStatus.OK:
                 logger.error(
                     'Ошибка установки вебхука для бота: {exc}\n{trace}'.format(
                         exc=status_code,
@@ -0,0 +1,8 @@
+from django.urls import path
+
+from server.bot.views import webhook
+
+
+urlpatterns = [
+    path('webhook/', webhook, name='webhook'),
+]
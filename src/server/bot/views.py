@@ -0,0 +1,35 @@
+import hmac
+
+from django.conf import settings
+from django.http import HttpRequest, HttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+from loguru import logger
+from telebot.types import Update
+
+from server.bot.dispatcher import update_streams
+
+
+SECRET_TOKEN_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+
+@csrf_exempt
+@require_POST
+def webhook(request: HttpRequest) -> HttpResponse:
+    """Приём обновлений Telegram и постановка их в очередь обработки с сохранением порядка внутри чата."""
+    secret_token = request.headers.get(SECRET_TOKEN_HEADER, "")
+    if not settings.WEBHOOK_SECRET or not hmac.compare_digest(secret_token, settings.WEBHOOK_SECRET):
+        logger.warning("Получен запрос на вебхук с неверным секретным токеном")
+        return HttpResponse(status=403)
+
+    data = request.body.decode("utf-8")
+    try:
+        update = Update.de_json(data)
+    except ValueError:
+        logger.error("Не удалось разобрать обновление Telegram")
+        return HttpResponse(status=400)
+
+    # Telegram не отправит следующее обновление чата, пока не получит ответ,
+    # поэтому ответ даётся только после записи обновления в очередь
+    update_streams.publish(update, data)
+    return HttpResponse(status=200)
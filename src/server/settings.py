@@ -134,14 +134,97 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REDIS_HOST = config('REDIS_HOST', default='localhost')
 REDIS_PORT = config('REDIS_PORT', default=6379, cast=int)
+REDIS_DB = config('REDIS_DB', default=0, cast=int)
+# Пул соединений общего клиента Redis (на процесс) и таймауты сокетов, секунд
+REDIS_MAX_CONNECTIONS = config('REDIS_MAX_CONNECTIONS', default=20, cast=int)
+REDIS_POOL_TIMEOUT = config('REDIS_POOL_TIMEOUT', default=10, cast=int)
+REDIS_SOCKET_TIMEOUT = config('REDIS_SOCKET_TIMEOUT', default=5, cast=float)
+REDIS_SOCKET_CONNECT_TIMEOUT = config('REDIS_SOCKET_CONNECT_TIMEOUT', default=5, cast=float)
+REDIS_HEALTH_CHECK_INTERVAL = config('REDIS_HEALTH_CHECK_INTERVAL', default=30, cast=int)
+REDIS_CLIENT_NAME = config('REDIS_CLIENT_NAME', default='letterbot')
+# Роль процесса (web, bot, celery-bulk, ...) в имени клиента Redis для статистики соединений
+PROCESS_ROLE = config('PROCESS_ROLE', default='')
 
 CELERY_BROKER_URL = f'redis://{REDIS_HOST}:{REDIS_PORT}/3'
 CELERY_BEAT_SCHEDULER = 'django_celery_beat.schedulers:DatabaseScheduler'
+# Отложенные задачи (шаги сценариев с задержкой) хранятся в брокере до наступления ETA и
+# возвращаются в очередь после перезапуска воркера. Задача с отсрочкой больше таймаута выдаётся
+# повторно, поэтому отсрочки ограничены MAILING_ETA_HORIZON и SCENARIO_STEP_MAX_COUNTDOWN
+CELERY_BROKER_TRANSPORT_OPTIONS = {
+    'visibility_timeout': config('CELERY_VISIBILITY_TIMEOUT', default=43200, cast=int),
+    'socket_timeout': REDIS_SOCKET_TIMEOUT,
+    'socket_connect_timeout': REDIS_SOCKET_CONNECT_TIMEOUT,
+    'health_check_interval': REDIS_HEALTH_CHECK_INTERVAL,
+    # Воркер, слушающий несколько очередей, берёт задачи в порядке очередей из -Q
+    'queue_order_strategy': 'priority',
+}
+CELERY_BROKER_POOL_LIMIT = config('CELERY_BROKER_POOL_LIMIT', default=10, cast=int)
+# Запланированные рассылки ставятся в очередь с ETA не дальше visibility_timeout (иначе брокер
+# выдаст задачу повторно), более поздние ставит сверка, которая запускается раз в интервал, секунд
+MAILING_ETA_HORIZON = CELERY_BROKER_TRANSPORT_OPTIONS['visibility_timeout']
+MAILING_RECONCILE_INTERVAL = config('MAILING_RECONCILE_INTERVAL', default=300, cast=int)
+# Шаг сценария с задержкой больше этой ждёт в брокере в несколько приёмов, секунд
+SCENARIO_STEP_MAX_COUNTDOWN = CELERY_BROKER_TRANSPORT_OPTIONS['visibility_timeout'] // 2
+# Очереди задач: interactive - планирование рассылок и ответы администратору,
+# scenario - шаги сценариев, bulk - отправка частей массовых рассылок. Очереди
+# обслуживаются отдельными воркерами, поэтому большая рассылка не задерживает сценарии
+CELERY_TASK_DEFAULT_QUEUE = 'interactive'
+CELERY_TASK_ROUTES = {
+    'server.apps.periodic_tasks.tasks.check_scenario_dispatcher': {'queue': 'scenario'},
+    'server.apps.periodic_tasks.tasks.send_scenario_step': {'queue': 'scenario'},
+    'server.apps.periodic_tasks.tasks.send_mailing_chunk': {'queue': 'bulk'},
+    'server.apps.periodic_tasks.tasks.retry_mailing_recipients': {'queue': 'bulk'},
+    'server.apps.periodic_tasks.tasks.send_file_chunk': {'queue': 'bulk'},
+    'server.apps.periodic_tasks.tasks.retry_file_recipients': {'queue': 'bulk'},
+}
 
 BOT_TOKEN = config('BOT_TOKEN', default='')
 APP_URL = config('APP_URL', default='')
+# Секретный токен вебхука: Telegram передаёт его в заголовке X-Telegram-Bot-Api-Secret-Token
+WEBHOOK_SECRET = config('WEBHOOK_SECRET', default='')
+# Очередь обновлений бота: число партиций (потоков обработки) и максимальная длина потока партиции
+BOT_UPDATE_WORKERS = config('BOT_UPDATE_WORKERS', default=8, cast=int)
+BOT_UPDATE_QUEUE_SIZE = config('BOT_UPDATE_QUEUE_SIZE', default=10000, cast=int)
+# Время жизни незавершённого диалога next-step хэндлера, секунд
+NEXT_STEP_HANDLER_TTL = config('NEXT_STEP_HANDLER_TTL', default=3600, cast=int)
+# Кеш известных пользователей бота в памяти процесса: число записей и время жизни, секунд
+KNOWN_USERS_CACHE_SIZE = config('KNOWN_USERS_CACHE_SIZE', default=10000, cast=int)
+KNOWN_USERS_CACHE_TTL = config('KNOWN_USERS_CACHE_TTL', default=600, cast=int)
+# Пакетное сохранение новых пользователей: период сохранения, секунд, размер пачки и время,
+# через которое несохранённая пачка упавшего процесса возвращается в очередь, секунд
+REGISTRATION_FLUSH_INTERVAL = config('REGISTRATION_FLUSH_INTERVAL', default=0.3, cast=float)
+REGISTRATION_BATCH_SIZE = config('REGISTRATION_BATCH_SIZE', default=500, cast=int)
+REGISTRATION_BATCH_TIMEOUT = config('REGISTRATION_BATCH_TIMEOUT', default=60, cast=int)
 
 ADMIN_IDS = config("ADMIN_IDS", cast=lambda v: [int(i) for i in v.split(",")])
 
 MAX_PHOTO_SIZE = 10485760
 MAX_VIDEO_SIZE = 52428800
+
+BROADCAST_CHUNK_SIZE = config('BROADCAST_CHUNK_SIZE', default=1000, cast=int)
+BROADCAST_GLOBAL_RATE = config('BROADCAST_GLOBAL_RATE', default=30, cast=float)
+BROADCAST_CHAT_RATE = config('BROADCAST_CHAT_RATE', default=1, cast=float)
+# Сообщений подряд в один чат без ожидания: медиа-группа и сообщение с кнопкой уходят сразу,
+# не задерживая последовательную отправку на секунду на каждого получателя
+BROADCAST_CHAT_BURST = config('BROADCAST_CHAT_BURST', default=2, cast=int)
+# Доли общей частоты по типам трафика, сообщений в секунду. Массовые рассылки не занимают
+# больше доли bulk, остаток общей частоты всегда доступен шагам сценариев
+BROADCAST_TRAFFIC_RATES = {
+    'bulk': config('BROADCAST_BULK_RATE', default=20, cast=float),
+    'scenario': config('BROADCAST_SCENARIO_RATE', default=30, cast=float),
+}
+MAILING_LOG_BATCH_SIZE = config('MAILING_LOG_BATCH_SIZE', default=500, cast=int)
+# Способ отправки рассылок: sync - последовательно через TeleBot, async - конкурентно через aiohttp
+BROADCAST_SENDER_BACKEND = config('BROADCAST_SENDER_BACKEND', default='sync')
+BROADCAST_ASYNC_CONCURRENCY = config('BROADCAST_ASYNC_CONCURRENCY', default=50, cast=int)
+# Ход рассылки в админке: период записи результатов в Redis и окно расчёта скорости, секунд
+BROADCAST_PROGRESS_FLUSH_INTERVAL = config('BROADCAST_PROGRESS_FLUSH_INTERVAL', default=1, cast=float)
+BROADCAST_PROGRESS_RATE_WINDOW = config('BROADCAST_PROGRESS_RATE_WINDOW', default=10, cast=int)
+# Повтор отправки после 429 и временных ошибок: число попыток и задержка без retry_after, секунд
+BROADCAST_MAX_RETRIES = config('BROADCAST_MAX_RETRIES', default=5, cast=int)
+BROADCAST_RETRY_DELAY = config('BROADCAST_RETRY_DELAY', default=5, cast=int)
+# Адаптивная общая частота: во сколько раз снижается после 429, нижняя граница
+# и скорость восстановления (сообщений в секунду за каждую секунду без 429)
+BROADCAST_THROTTLE_FACTOR = config('BROADCAST_THROTTLE_FACTOR', default=0.5, cast=float)
+BROADCAST_MIN_RATE = config('BROADCAST_MIN_RATE', default=1, cast=float)
+BROADCAST_RATE_RECOVERY = config('BROADCAST_RATE_RECOVERY', default=0.5, cast=float)